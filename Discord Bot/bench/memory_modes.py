@@ -0,0 +1,61 @@
+"""Memory comparison of the member-cache and lean (MEMBERS_INTENT=0) modes.
+
+Feeds synthetic GUILD_CREATE payloads through discord.py's ConnectionState
+with the cache settings main.py uses in each mode, plus the per-subscriber
+DM channel cache the lean mode keeps instead, and reports traced bytes.
+
+    python bench/memory_modes.py [--guilds N] [--members N] [--subscribers N]
+"""
+import argparse
+import tracemalloc
+from collections import OrderedDict
+
+import discord
+from discord.state import ConnectionState
+
+def guild_payload(guild_id, members, offset):
+    return {
+        "id": str(guild_id), "name": f"guild {guild_id}", "owner_id": "1", "member_count": members,
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [], "emojis": [], "stickers": [], "features": [],
+        "members": [
+            {"user": {"id": str(10**17 + offset + i), "username": f"user{offset + i}", "discriminator": "0", "avatar": None, "global_name": f"User {offset + i}"},
+             "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+            for i in range(members)
+        ],
+    }
+
+def measure(members_intent, guilds, members, subscribers):
+    intents = discord.Intents.default()
+    intents.members = members_intent
+    flags = discord.MemberCacheFlags.from_intents(intents) if members_intent else discord.MemberCacheFlags.none()
+    state = ConnectionState(dispatch=lambda *a, **k: None, handlers={}, hooks={}, http=None, intents=intents, member_cache_flags=flags, chunk_guilds_at_startup=members_intent)
+    payloads = [guild_payload(g + 1, members, g * members // 2) for g in range(guilds)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for payload in payloads:
+        state._add_guild_from_data(payload)
+    dm_channels = OrderedDict()
+    if not members_intent:
+        for i in range(subscribers):
+            dm_channels[10**17 + i] = 10**18 + i
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    cached = sum(len(g.members) for g in state.guilds)
+    return used, cached, len(state._users), len(dm_channels)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--guilds", type=int, default=5)
+    parser.add_argument("--members", type=int, default=20000)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.guilds} guilds x {args.members} members, {args.subscribers} subscribers")
+    for name, members_intent in (("members intent", True), ("lean", False)):
+        used, cached, users, dms = measure(members_intent, args.guilds, args.members, args.subscribers)
+        print(f"{name:>15}: {used / 1024 / 1024:8.2f} MB traced | {cached} cached members, {users} cached users, {dms} cached DM channels")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Parity and timing check for the new-release page parsers.
+
+Runs the streaming extractor (comick.parse_updates) and the reference
+BeautifulSoup parser (comick.parse_updates_soup) over the saved home2 pages
+in fixtures/ and fails if they disagree.
+
+    python bench/parse_parity.py [--repeat N]
+"""
+import os
+import sys
+import glob
+import argparse
+import timeit
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import comick
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+COOLDOWN_MINUTES = 10
+
+def check(path, repeat):
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+    reference = comick.parse_updates_soup(html)
+    fast = comick.parse_updates(html)
+    if fast != reference:
+        return False, f"full parse differs ({len(fast)} vs {len(reference)} cards)"
+
+    # Early termination must not drop anything inside the cooldown window.
+    cutoff = max(u.uploaded_time for u in reference) - timedelta(minutes=COOLDOWN_MINUTES)
+    fast_window = [u for u in comick.parse_updates(html, cutoff) if u.uploaded_time >= cutoff]
+    reference_window = [u for u in reference if u.uploaded_time >= cutoff]
+    if fast_window != reference_window:
+        return False, f"cooldown window differs ({len(fast_window)} vs {len(reference_window)} cards)"
+
+    soup_ms = min(timeit.repeat(lambda: comick.parse_updates_soup(html), number=1, repeat=repeat)) * 1000
+    fast_ms = min(timeit.repeat(lambda: comick.parse_updates(html), number=1, repeat=repeat)) * 1000
+    window_ms = min(timeit.repeat(lambda: comick.parse_updates(html, cutoff), number=1, repeat=repeat)) * 1000
+    return True, (
+        f"{len(reference)} cards, {len(reference_window)} in window | "
+        f"soup {soup_ms:.2f} ms, streaming {fast_ms:.2f} ms, streaming+cutoff {window_ms:.2f} ms "
+        f"({soup_ms / window_ms:.1f}x)"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    ok = True
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "home2_*.html"))):
+        passed, detail = check(path, args.repeat)
+        ok = ok and passed
+        print(f"[{'OK' if passed else 'FAIL'}] {os.path.basename(path)}: {detail}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
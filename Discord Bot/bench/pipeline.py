@@ -0,0 +1,202 @@
+"""Offline timing of the fetch_comics hot path: parse, match and fan-out.
+
+Parses the saved home2 pages in fixtures/, matches the cards against a
+synthetic subscription table and fans the notifications out through a real
+DeliveryQueue to a fake Discord client (guilds with roles and member lists,
+sends that only count). Results are written as JSON so runs from different
+versions can be compared.
+
+    python bench/pipeline.py [--subscriptions 1000,10000,100000,1000000] [--guilds N] [--members N]
+                             [--repeat N] [--output FILE] [--compare FILE]
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import comick
+import notify
+from delivery import DeliveryQueue
+from subscriptions import SubscriptionIndex, TitleMatcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+        self.mention = f"<@&{role_id}>"
+
+class FakeGuild:
+    def __init__(self, guild_id, roles, members):
+        self.id = guild_id
+        self.name = f"guild {guild_id}"
+        self.roles = {role.id: role for role in roles}
+        self.members = members
+
+class FakeClient:
+    """Just enough of discord.Client for fan-out: guilds, a user cache and sends that count."""
+
+    def __init__(self, guilds):
+        self.guilds = guilds
+        self.users = set().union(*(guild.members for guild in guilds)) if guilds else set()
+        self.dms = 0
+        self.announcements = 0
+
+    def get_user(self, user_id):
+        return user_id if user_id in self.users else None
+
+    def resolve_role(self, guild, role_ref):
+        return guild.roles.get(role_ref)
+
+    async def send_dm(self, user_id, content):
+        self.dms += 1
+
+    async def announce(self, guild, content):
+        self.announcements += 1
+
+def load_fixtures():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((os.path.basename(path), f.read()))
+    return pages
+
+def synthetic_state(titles, subscriptions, per_user, series_count, guilds, members, roles_per_guild, seed=1):
+    rng = random.Random(seed)
+    catalog = list(titles) + [f"Synthetic Series Title Number {i:05d}" for i in range(max(0, series_count - len(titles)))]
+    notify_me = SubscriptionIndex()
+    user_ids = [10**17 + i for i in range(max(1, subscriptions // per_user))]
+    for user_id in user_ids:
+        for name in rng.sample(catalog, min(per_user, len(catalog))):
+            notify_me.subscribe(user_id, name)
+
+    fake_guilds = []
+    notify_roles = {}
+    for g in range(guilds):
+        roles = [FakeRole(10**18 + g * 1000 + r) for r in range(roles_per_guild)]
+        fake_guilds.append(FakeGuild(10**16 + g, roles, set(rng.sample(user_ids, min(members, len(user_ids))))))
+        for role in roles:
+            for name in rng.sample(catalog, 5):
+                notify_roles.setdefault(name, []).append(role.id)
+    notify_all = set(rng.sample(list(titles), min(5, len(titles))))
+    return notify_me, notify_all, notify_roles, FakeClient(fake_guilds)
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+async def time_fan_out(notify_texts, dms, notify_all, notify_roles, client):
+    queue = DeliveryQueue(global_rate=10**9)
+    queue.start()
+    started = time.perf_counter()
+    recipients, messages = await notify.fan_out(
+        queue, notify_texts, dms, client.guilds, notify_all, notify_roles,
+        client.resolve_role, client.send_dm, client.announce, lambda user_id: client.get_user(user_id) is not None
+    )
+    queued = time.perf_counter() - started
+    await queue.join()
+    drained = time.perf_counter() - started
+    await queue.stop()
+    return queued, drained, recipients, messages, queue.stats["sent"]
+
+def run_scenario(pages, subscriptions, args):
+    releases = [release for _, html in pages for release in comick.parse_updates(html)]
+    notify_me, notify_all, notify_roles, client = synthetic_state(
+        {r.title for r in releases}, subscriptions, args.per_user, args.series, args.guilds, args.members, args.roles
+    )
+    matcher = TitleMatcher()
+    # The first sync indexes every stored name; later ticks only see what changed, which is what gets timed.
+    notify.match_releases(releases, matcher, notify_me, notify_all, notify_roles)
+    match_s, notify_texts = best_of(args.repeat, lambda: notify.match_releases(releases, matcher, notify_me, notify_all, notify_roles))
+    plan_s, dms = best_of(args.repeat, lambda: notify.plan_dms(notify_texts, notify_me))
+
+    fan_out = [asyncio.run(time_fan_out(notify_texts, dms, notify_all, notify_roles, client)) for _ in range(args.repeat)]
+    queued, drained, recipients, messages, sent = min(fan_out)
+    return {
+        "subscriptions": notify_me.subscription_count(),
+        "users": len(notify_me),
+        "guilds": len(client.guilds),
+        "releases": len(releases),
+        "matched_releases": sum(1 for names, _ in notify_texts if names),
+        "recipients": recipients,
+        "messages": messages,
+        "sent": sent,
+        "seconds": {"match": match_s, "plan_dms": plan_s, "fanout_enqueue": queued, "fanout_drain": drained},
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['revision']}):")
+    for stage, seconds in results["parse_seconds"].items():
+        before = baseline["parse_seconds"].get(stage)
+        if before:
+            print(f"  parse {stage:<24} {seconds / before:6.2f}x")
+    old = {s["subscriptions"]: s for s in baseline["scenarios"]}
+    for scenario in results["scenarios"]:
+        before = old.get(scenario["subscriptions"])
+        if not before:
+            continue
+        ratios = "  ".join(f"{stage} {seconds / before['seconds'][stage]:5.2f}x" for stage, seconds in scenario["seconds"].items() if before["seconds"].get(stage))
+        print(f"  {scenario['subscriptions']:>8} subs  {ratios}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscriptions", default="1000,10000,100000,1000000")
+    parser.add_argument("--per-user", type=int, default=10)
+    parser.add_argument("--series", type=int, default=5000)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--roles", type=int, default=3, help="notification roles per guild")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output")
+    parser.add_argument("--compare", help="earlier results file to report ratios against")
+    args = parser.parse_args()
+
+    pages = load_fixtures()
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "parse_seconds": {},
+        "scenarios": [],
+    }
+    for name, html in pages:
+        results["parse_seconds"][name] = best_of(args.repeat, lambda: comick.parse_updates(html))[0]
+        print(f"parse {name}: {results['parse_seconds'][name] * 1000:.2f} ms")
+    for subscriptions in (int(n) for n in args.subscriptions.split(",")):
+        scenario = run_scenario(pages, subscriptions, args)
+        results["scenarios"].append(scenario)
+        timings = "  ".join(f"{stage} {seconds * 1000:9.2f} ms" for stage, seconds in scenario["seconds"].items())
+        print(f"{scenario['subscriptions']:>8} subs, {scenario['users']} users, {scenario['recipients']} recipients, {scenario['messages']} messages | {timings}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{results['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""End-to-end replay: the bot's polling loop against the local stand-in server.
+
+Starts bench/standin.py in-process, runs main.py with Discord sends replaced
+by recorders (no gateway connection is made) and synthetic subscribers for
+the stand-in catalog, and lets fetch_comics poll for --duration seconds.
+Every published release that has subscribers is then checked for delivery,
+and detection-to-delivery latency (publish time to first send) is reported
+and written as JSON.
+
+    python bench/replay.py [--duration S] [--speed N] [--rate N] [--subscribers N] [--poll-floor S] [--output FILE]
+                           [standin options: --replay FILE ... --error-rate P --challenge-rate P --latency-ms N]
+
+A day of releases in ten minutes: --speed 144 --duration 600.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import contextlib
+import runpy
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import standin
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def load_bot(base_url, args):
+    os.environ.update({
+        "DISCORD_TOKEN": "replay",
+        "COMICK_NEW_RELEASES_URL": f"{base_url}/home2",
+        "COMICK_NEW_RELEASES_PAGE_URL": f"{base_url}/home2?page={{page}}",
+        "GOOGLE_DRIVE_TXT_URL": f"{base_url}/drive.txt",
+        "SUBSCRIPTIONS_BACKEND": "json",
+        "MEMBERS_INTENT": "0",
+        "METRICS_PORT": "0",
+        "POLL_BASE_SECONDS": str(args.poll_base),
+        "POLL_FLOOR_SECONDS": str(args.poll_floor),
+        "POLL_CEILING_SECONDS": str(args.poll_ceiling),
+        "POLL_ERROR_CEILING_SECONDS": str(args.poll_ceiling * 3),
+    })
+    import discord
+    discord.Client.run = lambda self, *a, **k: None
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+        # run_path returns a copy; the functions' own globals are what patching has to reach.
+        return runpy.run_path(os.path.join(BOT_DIR, "main.py"), run_name="replay")["fetch_comics"].coro.__globals__
+
+async def run(bot, server, args):
+    sends = []
+
+    async def send_dm(user_id, content):
+        sends.append((time.time(), ("user", user_id), content))
+
+    async def announce(guild, content):
+        sends.append((time.time(), ("guild", guild.id), content))
+
+    async def ready():
+        pass
+
+    bot["send_dm"] = send_dm
+    bot["announce"] = announce
+    bot["client"].wait_until_ready = ready
+
+    await bot["_refresh_catalog"]()
+    catalog = bot["series_catalog"]["series"]
+    rng = random.Random(args.seed)
+    for i in range(args.subscribers):
+        for name in rng.sample(catalog, min(args.per_user, len(catalog))):
+            bot["notify_me"].subscribe(10**17 + i, name)
+
+    started = time.time()
+    bot["delivery"].start()
+    bot["fetch_comics"].start()
+    await asyncio.sleep(args.duration)
+    # Stop publishing and give the last releases a full poll interval plus delivery to arrive.
+    server.feed.configure(paused=True)
+    stopped = time.time()
+    await asyncio.sleep(args.poll_ceiling + 1)
+    await bot["notify_batches"].join()
+    await bot["delivery"].join()
+    bot["fetch_comics"].cancel()
+    await bot["delivery"].stop()
+    return sends, started, stopped
+
+def report(bot, server, sends, started, stopped, args):
+    notify_me = bot["notify_me"]
+    first_sent, per_recipient = {}, {}
+    for sent_at, route, content in sends:
+        for line in content.splitlines():
+            if line.startswith("📚 "):
+                key = line.split(" *(Uploaded")[0]
+                first_sent[key] = min(first_sent.get(key, sent_at), sent_at)
+                per_recipient[(route, key)] = per_recipient.get((route, key), 0) + 1
+
+    latencies, missed = [], []
+    published = [r for r in server.feed.published if started <= r["published_at"] <= stopped]
+    for r in published:
+        if not len(notify_me.subscribers_of(r["title"])):
+            continue
+        key = f"📚 **{r['title']}** — {r['chapter']}"
+        if key in first_sent:
+            latencies.append(first_sent[key] - r["published_at"])
+        else:
+            missed.append(f"{r['title']} {r['chapter']}")
+    counters, gauges, stages = bot["metrics"].snapshot()
+    return {
+        "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+        "simulated_hours": (stopped - started) * args.speed / 3600,
+        "published": len(published),
+        "expected": len(latencies) + len(missed),
+        "delivered": len(latencies),
+        "missed": missed,
+        "duplicate_sends": sum(n - 1 for n in per_recipient.values() if n > 1),
+        "messages_sent": len(sends),
+        "comick_requests": server.requests,
+        "latency_seconds": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+        },
+        "bot_counters": counters,
+        "bot_stages": {stage: {"last": last, "mean": total / count, "count": count} for stage, (last, total, count) in stages.items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=60.0, help="real seconds to publish for")
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--per-user", type=int, default=10)
+    parser.add_argument("--poll-base", type=int, default=5)
+    parser.add_argument("--poll-floor", type=int, default=2)
+    parser.add_argument("--poll-ceiling", type=int, default=10)
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "replay.json"))
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own log output")
+    standin.add_arguments(parser)
+    args = parser.parse_args()
+
+    server = standin.from_arguments(args, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # The bot keeps its dedupe snapshot, cookies and subscriptions in the working directory.
+    workdir = tempfile.mkdtemp(prefix="comick-replay-")
+    output = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    os.chdir(workdir)
+    bot = load_bot(base_url, args)
+    print(f"Replaying against {base_url} for {args.duration:.0f}s at {args.speed}x ({workdir})")
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else open(os.devnull, "w")):
+        sends, started, stopped = asyncio.run(run(bot, server, args))
+    results = report(bot, server, sends, started, stopped, args)
+    server.shutdown()
+
+    latency = results["latency_seconds"]
+    print(f"{results['simulated_hours']:.1f} simulated hours: {results['published']} releases published, "
+          f"{results['delivered']}/{results['expected']} with subscribers delivered, {results['duplicate_sends']} duplicate sends, "
+          f"{results['comick_requests']} page requests")
+    if latency["p50"] is not None:
+        print(f"detection-to-delivery latency: p50 {latency['p50']:.2f}s  p90 {latency['p90']:.2f}s  p99 {latency['p99']:.2f}s  max {latency['max']:.2f}s")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
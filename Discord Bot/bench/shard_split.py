@@ -0,0 +1,82 @@
+"""Check that sharding across processes DMs every subscriber exactly once.
+
+Loads main.py once per fake process (SHARD_COUNT=N, SHARD_IDS=i, members
+intent on) over one shared SQLite store, with each process's user cache
+holding only the subscribers that share a guild on its shards. Some
+subscribers are only visible on a process that doesn't own them. Every
+process then delivers the same matched batch, and the DMs queued across all
+of them must cover each subscriber exactly once.
+
+    python bench/shard_split.py [--processes N] [--subscribers N]
+"""
+import os
+import sys
+import random
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import runpy
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BOT_DIR)
+import discord
+import storage
+
+class RecordingQueue:
+    def __init__(self):
+        self.jobs = []
+
+    async def put(self, route, send, *args, **kwargs):
+        self.jobs.append(route)
+
+def load_process(shard_id, processes):
+    os.environ.update({
+        "DISCORD_TOKEN": "shard-split",
+        "SHARD_COUNT": str(processes),
+        "SHARD_IDS": str(shard_id),
+        "MEMBERS_INTENT": "1",
+        "SUBSCRIPTIONS_BACKEND": "sqlite",
+        "METRICS_PORT": "0",
+    })
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        return runpy.run_path(os.path.join(BOT_DIR, "main.py"), run_name=f"shard{shard_id}")["fetch_comics"].coro.__globals__
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--subscribers", type=int, default=500)
+    args = parser.parse_args()
+
+    discord.Client.run = discord.AutoShardedClient.run = lambda self, *a, **k: None
+    os.chdir(tempfile.mkdtemp(prefix="comick-shards-"))
+    rng = random.Random(1)
+    subscribers = [rng.randrange(10**17, 2**62) for _ in range(args.subscribers)]
+    store = storage.SqliteStore("subscriptions.db")
+    for user_id in subscribers:
+        store.add_subscriptions(user_id, ["Shared Series"])
+    store.close()
+
+    # Each subscriber shares guilds with the bot on a random non-empty subset of the processes.
+    visible = {user_id: set(rng.sample(range(args.processes), rng.randint(1, args.processes))) for user_id in subscribers}
+    sent = {}
+    for shard_id in range(args.processes):
+        bot = load_process(shard_id, args.processes)
+        queue = bot["delivery"] = RecordingQueue()
+        bot["client"].get_user = lambda user_id, shard_id=shard_id: user_id if shard_id in visible.get(user_id, ()) else None
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            asyncio.run(bot["deliver_matched"]([({"Shared Series"}, "📚 **Shared Series** — Ch. 1")]))
+        for kind, user_id in queue.jobs:
+            sent[user_id] = sent.get(user_id, 0) + 1
+        bot["store"].close()
+
+    missed = [u for u in subscribers if u not in sent]
+    duplicated = [u for u, n in sent.items() if n > 1]
+    elsewhere = sum(1 for u in subscribers if (u >> 22) % args.processes not in visible[u])
+    ok = not missed and not duplicated and len(sent) == len(subscribers)
+    print(f"[{'OK' if ok else 'FAIL'}] {args.processes} processes, {len(subscribers)} subscribers "
+          f"({elsewhere} only visible on another process): {len(sent)} DMed, {len(missed)} missed, {len(duplicated)} duplicated")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
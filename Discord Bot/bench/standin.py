@@ -0,0 +1,241 @@
+"""Local stand-in for the comick new-releases pages and the Google Drive series list.
+
+Publishes releases on a schedule, either generated (--rate releases per hour
+over a synthetic catalog) or replayed from saved home2 pages / JSON lines
+files, with time compressed by --speed. Each release is stamped with the
+wall-clock time it becomes due (plus --stamp-offset), so the bot's cooldown
+and catch-up logic see realistic timestamps. Requests can be delayed and
+failed with Cloudflare-style 403 challenges or 503s.
+
+Point the bot at it with:
+
+    COMICK_NEW_RELEASES_URL=http://127.0.0.1:8321/home2
+    COMICK_NEW_RELEASES_PAGE_URL=http://127.0.0.1:8321/home2?page={page}
+    GOOGLE_DRIVE_TXT_URL=http://127.0.0.1:8321/drive.txt
+
+    python bench/standin.py [--port N] [--rate N] [--speed N] [--replay FILE ...] [--error-rate P] [--challenge-rate P] [--latency-ms N]
+
+Settings can be changed while running with GET /_control?rate=..&speed=..&error_rate=..,
+and GET /_published lists what has been published so far as JSON.
+"""
+import os
+import sys
+import json
+import html
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import comick
+
+CHALLENGE_PAGE = "<!DOCTYPE html><html><head><title>Just a moment...</title></head><body>Checking your browser before accessing comick.io.</body></html>"
+
+def slugify(title):
+    return "-".join("".join(c if c.isalnum() else " " for c in title.lower()).split())
+
+def load_replay(paths):
+    """Recorded releases as (title, chapter, slug, uploaded_time), oldest first, from home2 pages or JSON lines."""
+    releases = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".html"):
+                releases.extend((r.title, r.chapter, r.slug, r.uploaded_time) for r in comick.parse_updates(f.read()))
+                continue
+            for line in f:
+                if line.strip():
+                    r = json.loads(line)
+                    releases.append((r["title"], r["chapter"], r.get("slug") or slugify(r["title"]), datetime.fromisoformat(r["uploaded"].replace("Z", ""))))
+    releases = sorted(set(releases), key=lambda r: r[3])
+    return releases
+
+class Feed:
+    """Simulated release feed; simulated time advances at speed x wall-clock time."""
+
+    def __init__(self, catalog, rate=120.0, speed=1.0, stamp_offset=0.0, page_size=30, replay=None, seed=1):
+        self.catalog = catalog
+        self.rate = rate
+        self.speed = speed
+        self.stamp_offset = stamp_offset
+        self.page_size = page_size
+        self.paused = False
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.chapters = {}
+        self.published = []
+        self.replay = []
+        self.last_real = time.time()
+        self.sim = 0.0
+        if replay:
+            first = replay[0][3]
+            self.replay = [((uploaded - first).total_seconds(), title, chapter, slug) for title, chapter, slug, uploaded in replay]
+            self.next_due = self.replay[0][0]
+        else:
+            self.next_due = self._interval()
+        # A full page of history older than the bot's cooldown window, so the first poll has nothing to send.
+        for i in range(page_size):
+            self._publish(self.last_real - 3600 - (page_size - i) * 60)
+
+    def _interval(self):
+        return self.rng.expovariate(self.rate / 3600) if self.rate > 0 else float("inf")
+
+    def _publish(self, real_time, title=None, chapter=None, slug=None):
+        if title is None:
+            title = self.rng.choice(self.catalog)
+            self.chapters[title] = self.chapters.get(title, self.rng.randrange(1, 200)) + 1
+            chapter = f"Ch. {self.chapters[title]}"
+        self.published.append({
+            "title": title,
+            "chapter": chapter,
+            "slug": slug or slugify(title),
+            "published_at": real_time,
+            "uploaded": datetime.utcfromtimestamp(real_time + self.stamp_offset),
+        })
+
+    def advance(self):
+        with self.lock:
+            now = time.time()
+            if not self.paused:
+                target = self.sim + (now - self.last_real) * self.speed
+                while self.next_due <= target:
+                    # Stamp with the wall-clock moment the release fell due, not the moment someone asked.
+                    due_real = self.last_real + (self.next_due - self.sim) / self.speed
+                    if self.replay:
+                        _, title, chapter, slug = self.replay.pop(0)
+                        self._publish(due_real, title, chapter, slug)
+                        self.next_due = self.replay[0][0] if self.replay else float("inf")
+                    else:
+                        self._publish(due_real)
+                        self.next_due += self._interval()
+                self.sim = target
+            self.last_real = now
+
+    def configure(self, **settings):
+        self.advance()
+        with self.lock:
+            for name, value in settings.items():
+                if name == "rate" and not self.replay:
+                    self.rate = value
+                    self.next_due = self.sim + self._interval()
+                elif name in ("speed", "stamp_offset"):
+                    setattr(self, name, value)
+                elif name == "paused":
+                    self.paused = bool(value)
+
+    def page(self, number):
+        self.advance()
+        with self.lock:
+            end = len(self.published) - (number - 1) * self.page_size
+            cards = self.published[max(0, end - self.page_size):max(0, end)][::-1]
+        return render_page(cards)
+
+def render_page(cards):
+    items = "\n".join(
+        f'<a href="/comic/{c["slug"]}?lang=en" class="flex p-2 rounded hover:bg-gray-100"><div class="ml-2 min-w-0">'
+        f'<p class="series-title font-semibold truncate">{html.escape(c["title"])}</p>'
+        f'<p class="series-chapter text-sm">{html.escape(c["chapter"])}</p>'
+        f'<div class="text-xs text-gray-500"><time datetime="{c["uploaded"].isoformat(timespec="milliseconds")}Z"></time></div></div></a>'
+        for c in cards
+    )
+    build = f"{time.time():.6f}"
+    return (
+        f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Comick</title>'
+        f'<script id="__NEXT_DATA__" type="application/json">{{"buildId":"{build}"}}</script></head><body><main>'
+        f'<section><h2 class="text-xl">Updates</h2><div class="grid gap-2">\n{items}\n</div></section></main></body></html>'
+    )
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        settings = self.server.settings
+        if url.path == "/_control":
+            feed_settings = {k: float(v) for k, v in query.items() if k in ("rate", "speed", "stamp_offset", "paused")}
+            self.server.feed.configure(**feed_settings)
+            settings.update({k: float(v) for k, v in query.items() if k in settings})
+            return self._send(200, json.dumps({**settings, "rate": self.server.feed.rate, "speed": self.server.feed.speed}), "application/json")
+        if url.path == "/_published":
+            self.server.feed.advance()
+            with self.server.feed.lock:
+                published = [{**r, "uploaded": r["uploaded"].isoformat()} for r in self.server.feed.published]
+            return self._send(200, json.dumps(published), "application/json")
+        if url.path == "/drive.txt":
+            return self._send(200, "\n".join(self.server.feed.catalog) + "\n", "text/plain")
+        if url.path != "/home2":
+            return self._send(404, "not found", "text/plain")
+
+        self.server.requests += 1
+        time.sleep((settings["latency_ms"] + random.uniform(0, settings["jitter_ms"])) / 1000)
+        roll = random.random()
+        if roll < settings["challenge_rate"]:
+            return self._send(403, CHALLENGE_PAGE, "text/html", {"cf-mitigated": "challenge"})
+        if roll < settings["challenge_rate"] + settings["error_rate"]:
+            return self._send(503, "<html><body>503 Service Temporarily Unavailable</body></html>", "text/html")
+        body = self.server.feed.page(max(1, int(query.get("page", 1))))
+        etag = '"' + hashlib.blake2b(comick._relevant_slice(body).encode(), digest_size=16).hexdigest() + '"'
+        if settings["etags"] and self.headers.get("If-None-Match") == etag:
+            return self._send(304, "", "text/html", {"ETag": etag})
+        return self._send(200, body, "text/html", {"ETag": etag} if settings["etags"] else {})
+
+    def _send(self, status, body, content_type, headers=None):
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+def make_server(feed, host="127.0.0.1", port=8321, error_rate=0.0, challenge_rate=0.0, latency_ms=0.0, jitter_ms=0.0, etags=True):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.feed = feed
+    server.requests = 0
+    server.settings = {"error_rate": error_rate, "challenge_rate": challenge_rate, "latency_ms": latency_ms, "jitter_ms": jitter_ms, "etags": etags}
+    return server
+
+def add_arguments(parser):
+    parser.add_argument("--series", type=int, default=500, help="size of the synthetic catalog")
+    parser.add_argument("--rate", type=float, default=120.0, help="generated releases per simulated hour")
+    parser.add_argument("--speed", type=float, default=1.0, help="simulated seconds per real second")
+    parser.add_argument("--stamp-offset", type=float, default=0.0, help="seconds added to each release's timestamp")
+    parser.add_argument("--replay", nargs="*", default=[], help="saved home2 pages or JSON lines of releases to replay instead")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--challenge-rate", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--no-etags", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+
+def from_arguments(args, host="127.0.0.1", port=8321):
+    replay = load_replay(args.replay) if args.replay else None
+    catalog = sorted({r[0] for r in replay}) if replay else [f"Standin Series {i:04d}" for i in range(args.series)]
+    feed = Feed(catalog, rate=args.rate, speed=args.speed, stamp_offset=args.stamp_offset, replay=replay, seed=args.seed)
+    return make_server(feed, host, port, args.error_rate, args.challenge_rate, args.latency_ms, args.jitter_ms, not args.no_etags)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8321)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = from_arguments(args, args.host, args.port)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Serving {len(server.feed.catalog)} series on {base}/home2 and {base}/drive.txt")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""tracemalloc report of bytes per subscriber for the subscription table.
+
+Compares the old dict-of-sets notify_me (plus its title -> subscribers
+index) with subscriptions.SubscriptionIndex on synthetic data.
+
+    python bench/subscriptions_memory.py [--subscriptions N] [--per-user N] [--series N]
+"""
+import os
+import sys
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from subscriptions import SubscriptionIndex
+
+def synthetic(subscriptions, per_user, series_count, seed=1):
+    rng = random.Random(seed)
+    catalog = [f"Synthetic Series Title Number {i:05d}" for i in range(series_count)]
+    users = max(1, subscriptions // per_user)
+    return [(10**17 + rng.randrange(10**15), rng.sample(catalog, per_user)) for _ in range(users)]
+
+def build_sets(data):
+    notify_me, subscribers = {}, {}
+    for user_id, series in data:
+        for name in series:
+            notify_me.setdefault(user_id, set()).add(name)
+            subscribers.setdefault(name, set()).add(user_id)
+    return notify_me, subscribers
+
+def build_index(data):
+    index = SubscriptionIndex()
+    for user_id, series in data:
+        for name in series:
+            index.subscribe(user_id, name)
+    return index
+
+def traced(build, data):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(data)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscriptions", type=int, default=100000)
+    parser.add_argument("--per-user", type=int, default=5)
+    parser.add_argument("--series", type=int, default=2000)
+    args = parser.parse_args()
+
+    data = synthetic(args.subscriptions, args.per_user, args.series)
+    users = len(data)
+    print(f"{users} subscribers x {args.per_user} series = {users * args.per_user} subscriptions over {args.series} series")
+    for name, build in (("dict of sets", build_sets), ("SubscriptionIndex", build_index)):
+        used, _ = traced(build, data)
+        print(f"{name:>18}: {used / 1024 / 1024:7.2f} MB | {used / users:7.1f} bytes/subscriber | {used / (users * args.per_user):6.1f} bytes/subscription")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+import os
+import re
+import json
+import random
+import hashlib
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import cloudscraper
+from bs4 import BeautifulSoup
+
+REQUEST_TIMEOUT = 20
+COOKIES_FILE = "cookies.json"
+
+# One long-lived session per host, so keep-alive connections and solved
+# Cloudflare clearance cookies are reused across ticks and commands.
+_sessions = {}
+_sessions_lock = threading.Lock()
+_saved_state = {}
+_validators = {}
+
+# Parsed update card; namedtuple records carry no per-instance __dict__ (__slots__ = ()).
+Release = namedtuple("Release", "title chapter uploaded_time slug")
+
+if os.path.isfile(COOKIES_FILE):
+    try:
+        with open(COOKIES_FILE, "r") as f:
+            _saved_state = json.load(f)
+    except Exception as e:
+        print(f"[ERROR] Failed to load cookies: {e}")
+
+def _session_state(scraper):
+    return {
+        "user_agent": scraper.headers.get("User-Agent"),
+        "cookies": [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "expires": c.expires, "secure": c.secure}
+            for c in scraper.cookies
+        ],
+    }
+
+def _save_cookies(host):
+    # The bot and the scraper daemon share the file; only this host's entry is replaced, never another process's.
+    try:
+        saved = {}
+        if os.path.isfile(COOKIES_FILE):
+            with open(COOKIES_FILE, "r") as f:
+                saved = json.load(f)
+        saved[host] = _saved_state[host]
+        tmp = f"{COOKIES_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(saved, f)
+        os.replace(tmp, COOKIES_FILE)
+    except Exception as e:
+        print(f"[ERROR] Failed to save cookies: {e}")
+
+def _get_session(host):
+    with _sessions_lock:
+        entry = _sessions.get(host)
+        if entry is None:
+            scraper = cloudscraper.create_scraper()
+            saved = _saved_state.get(host)
+            if saved:
+                # Clearance cookies are bound to the user agent that solved the challenge.
+                if saved.get("user_agent"):
+                    scraper.headers["User-Agent"] = saved["user_agent"]
+                for c in saved.get("cookies", []):
+                    scraper.cookies.set(c["name"], c["value"], domain=c["domain"], path=c["path"], expires=c["expires"], secure=c["secure"])
+            entry = _sessions[host] = (scraper, threading.Lock())
+        return entry
+
+def _get(url, headers=None):
+    host = urlsplit(url).netloc
+    scraper, lock = _get_session(host)
+    with lock:
+        response = scraper.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        state = _session_state(scraper)
+    if state != _saved_state.get(host):
+        with _sessions_lock:
+            _saved_state[host] = state
+            _save_cookies(host)
+    return response
+
+def fetch(url):
+    response = _get(url)
+    return response.status_code, response.text
+
+def _relevant_slice(html):
+    # Only the update cards matter; build ids, nonces and ads elsewhere in the page change every request.
+    start = html.find("series-title")
+    end = html.rfind("</time>")
+    if start == -1 or end < start:
+        return html
+    return html[start:end]
+
+def fetch_if_changed(url):
+    """Fetch url, returning (status, text, validators) with text set to None when the page is unchanged.
+
+    Unchanged means unchanged since the last validators passed to
+    commit_validators, so a page that failed to process is served again.
+    """
+    validators = _validators.get(url, {})
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = _get(url, headers=headers)
+    if response.status_code == 304:
+        return 200, None, None
+    if response.status_code != 200:
+        return response.status_code, response.text, None
+
+    new_validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "digest": hashlib.blake2b(_relevant_slice(response.text).encode(), digest_size=16).digest(),
+    }
+    if new_validators["digest"] == validators.get("digest"):
+        # Same cards as the page already processed; only the validators moved on.
+        commit_validators(url, new_validators)
+        return 200, None, None
+    return 200, response.text, new_validators
+
+def commit_validators(url, validators):
+    """Record validators from fetch_if_changed once their page has been fully processed."""
+    _validators[url] = validators
+
+def fetch_lines(url):
+    status, text = fetch(url)
+    if status != 200:
+        return []
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def slug_from_href(href):
+    """Comick series slug from a card link such as /comic/<slug>/<chapter>?lang=en."""
+    parts = urlsplit(href or "").path.strip("/").split("/")
+    if len(parts) >= 2 and parts[0] == "comic":
+        return parts[1].lower()
+    return None
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+class _StopParsing(Exception):
+    pass
+
+class UpdateExtractor(HTMLParser):
+    """Streaming extractor for series-title / series-chapter / time cards.
+
+    Mirrors parse_updates_soup: cards inside the div following the "Updates"
+    heading win, otherwise every complete card on the page is used. Since the
+    updates list is newest first, parsing stops at the first card in it that
+    is older than cutoff.
+    """
+
+    def __init__(self, cutoff=None):
+        super().__init__(convert_charrefs=True)
+        self.cutoff = cutoff
+        self.cards = []
+        self.section_found = False
+        self.container_has_links = False
+        self._h2_text = None
+        self._await_container = False
+        self._container_depth = 0
+        self._card = None
+        self._field = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "div":
+            if self._container_depth:
+                self._container_depth += 1
+            elif self._await_container:
+                self._await_container = False
+                self._container_depth = 1
+        elif tag == "h2" and not self.section_found:
+            self._h2_text = []
+        elif tag == "a":
+            attrs = dict(attrs)
+            if attrs.get("href") is not None:
+                self._card = {"in_container": bool(self._container_depth), "href": attrs["href"]}
+                if self._container_depth:
+                    self.container_has_links = True
+        elif self._card is not None:
+            if tag == "p" and self._field is None:
+                classes = (dict(attrs).get("class") or "").split()
+                for field in ("series-title", "series-chapter"):
+                    if field in classes and field not in self._card:
+                        self._field = field
+                        self._card[field] = []
+            elif tag == "time" and "time" not in self._card:
+                self._card["time"] = dict(attrs).get("datetime")
+
+    def handle_endtag(self, tag):
+        if tag == "div" and self._container_depth:
+            self._container_depth -= 1
+        elif tag == "h2" and self._h2_text is not None:
+            if re.search("Updates", "".join(self._h2_text), re.IGNORECASE):
+                self.section_found = True
+                self._await_container = True
+            self._h2_text = None
+        elif tag == "p" and self._field is not None:
+            self._field = None
+        elif tag == "a" and self._card is not None:
+            card, self._card = self._card, None
+            self._finish_card(card)
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._card[self._field].append(data)
+        if self._h2_text is not None:
+            self._h2_text.append(data)
+
+    def _finish_card(self, card):
+        if not ("series-title" in card and "series-chapter" in card and "time" in card):
+            return
+        try:
+            uploaded_time = _parse_time(card["time"])
+        except Exception as e:
+            print(f"[WARN] Error parsing comic card: {e}")
+            return
+        self.cards.append((card["in_container"], Release("".join(card["series-title"]).strip(), "".join(card["series-chapter"]).strip(), uploaded_time, slug_from_href(card["href"]))))
+        if card["in_container"] and self.cutoff is not None and uploaded_time < self.cutoff:
+            raise _StopParsing
+
+    def updates(self):
+        in_container = self.section_found and self.container_has_links
+        return [release for inside, release in self.cards if inside or not in_container]
+
+def parse_updates(html, cutoff=None):
+    extractor = UpdateExtractor(cutoff)
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except _StopParsing:
+        pass
+    return extractor.updates()
+
+def parse_updates_soup(html):
+    soup = BeautifulSoup(html, "html.parser")
+    update_cards = []
+
+    updates_section = soup.find("h2", string=re.compile("Updates", re.IGNORECASE))
+    if updates_section:
+        container = updates_section.find_next("div")
+        if container:
+            update_cards = container.find_all("a", href=True)
+
+    if not update_cards:
+        for card in soup.find_all("a", href=True):
+            if card.find("p", class_="series-title") and card.find("p", class_="series-chapter") and card.find("time"):
+                update_cards.append(card)
+
+    updates = []
+    for card in update_cards:
+        try:
+            title_tag = card.find("p", class_="series-title")
+            chapter_tag = card.find("p", class_="series-chapter")
+            time_tag = card.find("time")
+            if not (title_tag and chapter_tag and time_tag):
+                continue
+
+            title = title_tag.text.strip()
+            chapter = chapter_tag.text.strip()
+            uploaded_time = _parse_time(time_tag.get("datetime"))
+            updates.append(Release(title, chapter, uploaded_time, slug_from_href(card.get("href"))))
+        except Exception as e:
+            print(f"[WARN] Error parsing comic card: {e}")
+    return updates
+
+def _epoch(t):
+    return int((t - datetime(1970, 1, 1)).total_seconds())
+
+class DedupeWindow:
+    """Seen "title|chapter" keys, kept only while their upload time is inside the cooldown window.
+
+    Also tracks the high-water mark, the newest upload time processed so far.
+    Both are snapshotted to path as {"high_water": epoch, "seen": {key: epoch}}
+    so a restart neither re-sends notifications nor forgets where to catch up from.
+    """
+
+    def __init__(self, window_minutes, path=None):
+        self.window = timedelta(minutes=window_minutes)
+        self.path = path
+        self.seen = {}
+        self.high_water = None
+        self._dirty = False
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                if "seen" not in data:
+                    data = {"seen": data}
+                self.seen = {k: datetime.utcfromtimestamp(v) for k, v in data["seen"].items()}
+                if data.get("high_water") is not None:
+                    self.high_water = datetime.utcfromtimestamp(data["high_water"])
+            except Exception as e:
+                print(f"[ERROR] Failed to load dedupe snapshot: {e}")
+        self.evict(datetime.utcnow() - self.window)
+
+    def __contains__(self, key):
+        return key in self.seen
+
+    def __len__(self):
+        return len(self.seen)
+
+    def add(self, key, uploaded_time):
+        if key in self.seen:
+            return False
+        self.seen[key] = uploaded_time
+        self._dirty = True
+        return True
+
+    def advance(self, uploaded_time):
+        if self.high_water is None or uploaded_time > self.high_water:
+            self.high_water = uploaded_time
+            self._dirty = True
+
+    def evict(self, cutoff):
+        # Keys at the high-water mark are still needed to dedupe a catch-up walk starting from it.
+        if self.high_water is not None:
+            cutoff = min(cutoff, self.high_water)
+        expired = [k for k, t in self.seen.items() if t < cutoff]
+        for k in expired:
+            del self.seen[k]
+        if expired:
+            self._dirty = True
+
+    def save(self):
+        if not (self.path and self._dirty):
+            return
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({
+                    "high_water": _epoch(self.high_water) if self.high_water else None,
+                    "seen": {k: _epoch(t) for k, t in self.seen.items()}
+                }, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[ERROR] Failed to save dedupe snapshot: {e}")
+
+class PollScheduler:
+    """Picks the delay before the next poll of the new-releases page.
+
+    Halves the interval (down to floor) while new chapters keep appearing,
+    stretches it (up to ceiling) while the page is stable, and backs off
+    exponentially with jitter (up to error_ceiling) on fetch errors.
+    """
+
+    def __init__(self, base=60, floor=20, ceiling=300, error_ceiling=900, jitter=0.1):
+        self.base = base
+        self.floor = floor
+        self.ceiling = ceiling
+        self.error_ceiling = error_ceiling
+        self.jitter = jitter
+        self.interval = base
+        self.errors = 0
+
+    def record(self, outcome):
+        """Record a tick outcome ("new", "changed", "unchanged" or "error") and return the next delay in seconds."""
+        if outcome == "error":
+            self.errors += 1
+            delay = min(self.error_ceiling, max(self.interval, self.base) * 2 ** self.errors)
+            return random.uniform(delay / 2, delay)
+        self.errors = 0
+        if outcome == "new":
+            self.interval = max(self.floor, self.interval / 2)
+        elif outcome == "unchanged":
+            self.interval = min(self.ceiling, self.interval * 1.25)
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
@@ -0,0 +1,198 @@
+import time
+import random
+import asyncio
+from collections import deque
+
+import aiohttp
+import discord
+
+MESSAGE_LIMIT = 2000
+
+def split_message(lines, header=None, limit=MESSAGE_LIMIT):
+    """Join lines into as few messages as fit Discord's length limit, repeating header on each."""
+    messages = []
+    current = header or ""
+    for line in lines:
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit and current and current != header:
+            messages.append(current)
+            candidate = f"{header}\n{line}" if header else line
+        current = candidate
+    if current and current != header:
+        messages.append(current)
+    return messages
+
+class TokenBucket:
+    """Global send budget, kept under Discord's 50 requests/s global limit."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class DeliveryQueue:
+    """Bounded queue of outgoing messages drained by a pool of workers.
+
+    Each job has a route key (the DM recipient or guild channel it goes to).
+    Every route keeps its own FIFO of jobs and waits in a queue of ready
+    routes only while none of its sends is in flight, so jobs on one route go
+    out one at a time and in order without a worker ever sitting on another
+    worker's route. All routes share a global token bucket. 429s and 5xx
+    responses are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, maxsize=5000, workers=8, global_rate=40, max_retries=5, base_delay=1.0):
+        self.slots = asyncio.Semaphore(maxsize)
+        self.routes = {}
+        self.ready = asyncio.Queue()
+        self.queued = 0
+        self.unfinished = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.workers = workers
+        self.bucket = TokenBucket(global_rate)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.tasks = []
+        self.sent_times = deque()
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "rate_limit_wait": 0.0, "send_seconds": 0.0}
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def put(self, route, send, *args, **kwargs):
+        """Queue send(*args, **kwargs); waits if the queue is full."""
+        await self._put(route, (send, args, kwargs, None))
+
+    def batch(self, done=None):
+        """A Batch of jobs on this queue; done resolves once all of them are sent or given up on."""
+        return Batch(self, done)
+
+    async def _put(self, route, job):
+        await self.slots.acquire()
+        self.queued += 1
+        self.unfinished += 1
+        self.idle.clear()
+        jobs = self.routes.get(route)
+        if jobs is None:
+            # Listed in routes while it has jobs queued or a send in flight; only a route without one is made ready.
+            jobs = self.routes[route] = deque()
+            self.ready.put_nowait(route)
+        jobs.append(job)
+
+    def depth(self):
+        return self.queued
+
+    async def join(self):
+        """Wait until every queued job has been sent or given up on."""
+        await self.idle.wait()
+
+    def throughput(self, window=60):
+        cutoff = time.monotonic() - window
+        while self.sent_times and self.sent_times[0] < cutoff:
+            self.sent_times.popleft()
+        return len(self.sent_times) / window
+
+    async def _worker(self):
+        while True:
+            route = await self.ready.get()
+            jobs = self.routes[route]
+            send, args, kwargs, finished = jobs.popleft()
+            self.queued -= 1
+            self.slots.release()
+            try:
+                await self._deliver(route, send, args, kwargs)
+            except Exception as e:
+                print(f"[ERROR] Delivery worker error for {route}: {e}")
+            finally:
+                if finished:
+                    finished()
+                # Back in line behind the other ready routes, so a busy guild can't keep a worker to itself.
+                if jobs:
+                    self.ready.put_nowait(route)
+                else:
+                    del self.routes[route]
+                self.unfinished -= 1
+                if not self.unfinished:
+                    self.idle.set()
+
+    async def _deliver(self, route, send, args, kwargs):
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            await self.bucket.acquire()
+            self.stats["rate_limit_wait"] += time.monotonic() - started
+            try:
+                started = time.monotonic()
+                try:
+                    await send(*args, **kwargs)
+                finally:
+                    self.stats["send_seconds"] += time.monotonic() - started
+                self.stats["sent"] += 1
+                self.sent_times.append(time.monotonic())
+                return
+            except discord.RateLimited as e:
+                delay = e.retry_after
+            except discord.HTTPException as e:
+                if e.status != 429 and e.status < 500:
+                    self.stats["failed"] += 1
+                    print(f"[WARN] Failed to deliver to {route}: {e}")
+                    return
+                delay = self.base_delay * 2 ** attempt
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                delay = self.base_delay * 2 ** attempt
+            if attempt < self.max_retries:
+                self.stats["retried"] += 1
+                wait = delay + random.uniform(0, delay / 2)
+                self.stats["rate_limit_wait"] += wait
+                await asyncio.sleep(wait)
+        self.stats["failed"] += 1
+        print(f"[WARN] Giving up delivering to {route} after {self.max_retries} retries")
+
+class Batch:
+    """Jobs put on a DeliveryQueue through this are tracked together.
+
+    Once close() is called and every job has been sent or given up on, the
+    done future resolves, so a caller can tell when a whole fan-out is out.
+    """
+
+    def __init__(self, queue, done=None):
+        self.queue = queue
+        self.done = done or asyncio.get_running_loop().create_future()
+        self.pending = 0
+        self.closed = False
+
+    async def put(self, route, send, *args, **kwargs):
+        self.pending += 1
+        await self.queue._put(route, (send, args, kwargs, self._finished))
+
+    def close(self):
+        self.closed = True
+        self._check()
+
+    def _finished(self):
+        self.pending -= 1
+        self._check()
+
+    def _check(self):
+        if self.closed and not self.pending and not self.done.done():
+            self.done.set_result(None)
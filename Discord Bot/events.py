@@ -0,0 +1,149 @@
+import os
+import json
+import asyncio
+from collections import deque
+
+class EventLog:
+    """The last keep published events, numbered by seq and appended to path so numbering and replay survive a restart."""
+
+    def __init__(self, path=None, keep=2000):
+        self.path = path
+        self.keep = keep
+        self.events = deque(maxlen=keep)
+        self.seq = 0
+        self._lines = 0
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    for line in f:
+                        if line.strip():
+                            self.events.append(json.loads(line))
+                            self._lines += 1
+                if self.events:
+                    self.seq = self.events[-1]["seq"]
+            except Exception as e:
+                print(f"[ERROR] Failed to load event log: {e}")
+
+    def append(self, event):
+        self.seq += 1
+        event = {"seq": self.seq, **event}
+        self.events.append(event)
+        if self.path:
+            try:
+                if self._lines >= 2 * self.keep:
+                    self._compact()
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(event) + "\n")
+                self._lines += 1
+            except Exception as e:
+                print(f"[ERROR] Failed to append to event log: {e}")
+        return event
+
+    def _compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for event in list(self.events)[:-1]:
+                f.write(json.dumps(event) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(self.events) - 1
+
+    def since(self, seq):
+        """Events after seq, and whether any in between have already been dropped."""
+        events = [e for e in self.events if e["seq"] > seq]
+        return events, bool(self.events) and self.events[0]["seq"] > seq + 1
+
+class EventBus:
+    """Publisher side of the local event bus: JSON events, one per line, sent to every connected follower.
+
+    Followers open with {"since": seq}; with a log, every retained event
+    after seq is replayed before live events, so a follower that restarts or
+    reconnects picks up where it left off. A follower that can't keep up
+    within timeout seconds is dropped and has to reconnect.
+    """
+
+    def __init__(self, log=None, timeout=5):
+        self.log = log
+        self.timeout = timeout
+        self.writers = set()
+        self.server = None
+
+    async def start(self, host, port):
+        self.server = await asyncio.start_server(self._accept, host, port)
+
+    async def _accept(self, reader, writer):
+        try:
+            hello = json.loads(await asyncio.wait_for(reader.readline(), self.timeout) or "{}")
+        except (ValueError, OSError, ConnectionError, asyncio.TimeoutError):
+            hello = {}
+        since = hello.get("since")
+        if self.log is not None and since is not None:
+            replay, gap = self.log.since(since)
+            if gap:
+                print(f"[WARN] Follower asked for events after {since}, oldest retained is {self.log.events[0]['seq']}")
+            for event in replay:
+                writer.write((json.dumps(event) + "\n").encode())
+        # No await between the replay and joining the live set, so nothing published in between is missed.
+        self.writers.add(writer)
+        print(f"[INFO] Event bus follower connected ({len(self.writers)} total)")
+        try:
+            await writer.drain()
+            await reader.read()
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def publish(self, event, persist=True):
+        """Send event to every follower; with a log and persist, it is numbered and kept for replay."""
+        if self.log is not None and persist:
+            event = self.log.append(event)
+        line = (json.dumps(event) + "\n").encode()
+        for writer in list(self.writers):
+            try:
+                writer.write(line)
+                await asyncio.wait_for(writer.drain(), self.timeout)
+            except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+                print(f"[WARN] Dropping event bus follower: {e!r}")
+                self.writers.discard(writer)
+                writer.close()
+
+    def close(self):
+        if self.server:
+            self.server.close()
+        for writer in self.writers:
+            writer.close()
+
+async def follow(host, port, handler, position=None, retry_seconds=5):
+    """Follower side: await handler(event) for every event published, reconnecting whenever the publisher goes away.
+
+    position() returns the seq of the last event handled (None for live
+    events only) and is sent on every (re)connect to have the gap replayed.
+    """
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError as e:
+            print(f"[WARN] Event bus at {host}:{port} unavailable: {e}")
+            await asyncio.sleep(retry_seconds)
+            continue
+        since = position() if position else None
+        print(f"[INFO] Following event bus at {host}:{port}" + (f" from event {since}" if since is not None else ""))
+        try:
+            writer.write((json.dumps({"since": since}) + "\n").encode())
+            await writer.drain()
+            while line := await reader.readline():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    print(f"[WARN] Skipping malformed event: {line[:100]!r}")
+                    continue
+                try:
+                    await handler(event)
+                except Exception as e:
+                    print(f"[ERROR] Failed to handle event: {e!r}")
+        except (OSError, ConnectionError) as e:
+            print(f"[WARN] Lost event bus connection: {e}")
+        finally:
+            writer.close()
+        await asyncio.sleep(retry_seconds)
@@ -3,186 +3,615 @@ from discord import app_commands
 from discord.ext import tasks
 import os
 import sys
-import cloudscraper
-from bs4 import BeautifulSoup
+import signal
+import json
+import hashlib
+import asyncio
+import resource
+from collections import OrderedDict
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-import re
 import subprocess
-import json
+import comick
+import storage
+import notify
+import events
+import metrics as pipeline_metrics
+from subscriptions import TitleMatcher, SeriesSearch, load_aliases, normalize
+from delivery import DeliveryQueue
+from poller import ReleasePoller
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
-GOOGLE_DRIVE_TXT_URL = "https://drive.google.com/uc?export=download&id=1C-yV7YbYY3KUJ-x6XD5oENL8qrw6thAE"
-COMICK_NEW_RELEASES_URL = "https://comick.io/home2#view=\"new\""
-
-notify_me = {}
-notify_all = set()
-notify_roles = {}
-last_seen_titles = set()
+GOOGLE_DRIVE_TXT_URL = os.getenv("GOOGLE_DRIVE_TXT_URL", "https://drive.google.com/uc?export=download&id=1C-yV7YbYY3KUJ-x6XD5oENL8qrw6thAE")
+COMICK_NEW_RELEASES_URL = os.getenv("COMICK_NEW_RELEASES_URL", "https://comick.io/home2#view=\"new\"")
+COMICK_NEW_RELEASES_PAGE_URL = os.getenv("COMICK_NEW_RELEASES_PAGE_URL", "https://comick.io/home2?page={page}")
+
+announce_channels = {}
+role_index = {}
+dm_channels = OrderedDict()
+metrics = pipeline_metrics.Metrics()
+metrics_server = {"server": None}
+bus_follower = {"task": None}
+# Matched batches waiting for fan-out; unbounded so polling never waits on the delivery queue.
+notify_batches = asyncio.Queue()
+dispatcher = {"task": None}
+pending_releases = []
+release_batch = {"task": None}
+subscription_sync = {"task": None}
+series_catalog = {"series": [], "fetched_at": None, "refresh": None, "search": SeriesSearch()}
 
 COOLDOWN_MINUTES = 10
+SCRAPE_TIMEOUT = 45
+CATALOG_TTL_MINUTES = 15
+SUBSCRIPTIONS_FLUSH_SECONDS = 5
+MEMBERS_INTENT = os.getenv("MEMBERS_INTENT", "1") == "1"
+DM_CHANNEL_CACHE_SIZE = 20000
+POLL_BASE_SECONDS = int(os.getenv("POLL_BASE_SECONDS", "60"))
+POLL_FLOOR_SECONDS = int(os.getenv("POLL_FLOOR_SECONDS", "20"))
+POLL_CEILING_SECONDS = int(os.getenv("POLL_CEILING_SECONDS", "300"))
+POLL_ERROR_CEILING_SECONDS = int(os.getenv("POLL_ERROR_CEILING_SECONDS", "900"))
+CATCHUP_MAX_HOURS = 24
+CATCHUP_MAX_PAGES = 10
+CATCHUP_BATCH_SIZE = 25
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+MAX_TICK_AGE_SECONDS = 3 * POLL_ERROR_CEILING_SECONDS
 subscriptions_file = "subscriptions.json"
-
-if os.path.isfile(subscriptions_file):
-    try:
-        with open(subscriptions_file, "r") as f:
-            data = json.load(f)
-            notify_me = {int(k): set(v) for k, v in data.get("notify_me", {}).items()}
-            notify_all = set(data.get("notify_all", []))
-            notify_roles = data.get("notify_roles", {})
-    except Exception as e:
-        print(f"[ERROR] Failed to load subscriptions: {e}")
-
-def save_subscriptions():
-    try:
-        with open(subscriptions_file, "w") as f:
-            json.dump({
-                "notify_me": {str(uid): list(series) for uid, series in notify_me.items()},
-                "notify_all": list(notify_all),
-                "notify_roles": notify_roles
-            }, f, indent=4)
-    except Exception as e:
-        print(f"[ERROR] Failed to save subscriptions: {e}")
+subscriptions_db = "subscriptions.db"
+aliases_file = "aliases.json"
+SUBSCRIPTIONS_BACKEND = os.getenv("SUBSCRIPTIONS_BACKEND", "sqlite")
+# SHARD_COUNT alone runs every shard in this process; SHARD_IDS picks this process's share of them.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = [int(s) for s in os.getenv("SHARD_IDS", "").split(",") if s.strip()] or None
+MULTI_PROCESS = SHARD_IDS is not None and SHARD_COUNT is not None and len(SHARD_IDS) < SHARD_COUNT
+# One process scrapes and matches; the rest only deliver what it publishes on the event bus.
+SCRAPE_LEADER = os.getenv("SCRAPE_LEADER", "1" if not MULTI_PROCESS or 0 in SHARD_IDS else "0") == "1"
+EVENT_BUS_HOST = os.getenv("EVENT_BUS_HOST", "127.0.0.1")
+EVENT_BUS_PORT = int(os.getenv("EVENT_BUS_PORT", "8765"))
+SUBSCRIPTIONS_SYNC_SECONDS = 5
+# "daemon": releases come from scraper_daemon.py instead of being scraped here.
+RELEASE_SOURCE = os.getenv("RELEASE_SOURCE", "local")
+SCRAPER_DAEMON_HOST = os.getenv("SCRAPER_DAEMON_HOST", "127.0.0.1")
+SCRAPER_DAEMON_PORT = int(os.getenv("SCRAPER_DAEMON_PORT", "8766"))
+EVENT_BATCH_SECONDS = 2
+release_cursor_file = f"release_cursor_{min(SHARD_IDS)}.json" if MULTI_PROCESS else "release_cursor.json"
+poll_scheduler = comick.PollScheduler(POLL_BASE_SECONDS, POLL_FLOOR_SECONDS, POLL_CEILING_SECONDS, POLL_ERROR_CEILING_SECONDS)
+poller = None
+if RELEASE_SOURCE == "local":
+    # With the daemon, seen.json and the comick.io session belong to it alone.
+    poller = ReleasePoller(COMICK_NEW_RELEASES_URL, COMICK_NEW_RELEASES_PAGE_URL, comick.DedupeWindow(COOLDOWN_MINUTES, "seen.json"),
+                           metrics, COOLDOWN_MINUTES, SCRAPE_TIMEOUT, CATCHUP_MAX_HOURS, CATCHUP_MAX_PAGES, CATCHUP_BATCH_SIZE)
+
+if MULTI_PROCESS and SUBSCRIPTIONS_BACKEND != "sqlite":
+    print("[WARN] Sharding across processes needs SUBSCRIPTIONS_BACKEND=sqlite for subscriptions to be shared")
+store = storage.open_store(SUBSCRIPTIONS_BACKEND, subscriptions_file, subscriptions_db)
+event_bus = events.EventBus()
+
+def load_subscriptions():
+    version = store.data_version()
+    apply_subscriptions(store.load(), version)
+
+def apply_subscriptions(state, version):
+    global notify_me, notify_all, notify_roles, notify_channels, title_matcher, store_version
+    store_version = version
+    notify_me, notify_all, notify_roles, notify_channels = state
+    title_matcher = TitleMatcher(load_aliases(aliases_file))
+    # Role mappings are role IDs; names are only left over from before the ID migration.
+    for roles in notify_roles.values():
+        roles[:] = [int(r) if str(r).isdigit() else r for r in roles]
+
+load_subscriptions()
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
-intents.members = True
-client = discord.Client(intents=intents)
+intents.members = MEMBERS_INTENT
+# DM targets come from the subscription data, so without the members intent no member list is needed at all.
+client_options = {} if MEMBERS_INTENT else {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+if SHARD_COUNT or SHARD_IDS:
+    client = discord.AutoShardedClient(intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **client_options)
+else:
+    client = discord.Client(intents=intents, **client_options)
 tree = app_commands.CommandTree(client)
+delivery = DeliveryQueue()
+metrics.collect(lambda: {
+    "delivery_sent": delivery.stats["sent"],
+    "delivery_failed": delivery.stats["failed"],
+    "delivery_retried": delivery.stats["retried"],
+    "delivery_rate_limit_wait_seconds": round(delivery.stats["rate_limit_wait"], 3),
+    "delivery_send_seconds": round(delivery.stats["send_seconds"], 3),
+    "delivery_queue_depth": delivery.depth(),
+    "delivery_messages_per_second": round(delivery.throughput(), 3),
+    "subscribers": len(notify_me),
+    "poll_interval_seconds": round(fetch_comics.seconds or 0, 1),
+    "notify_batches_pending": notify_batches.qsize(),
+})
+if poller:
+    metrics.collect(lambda: {"backlog_releases": len(poller.backlog)})
 
 def is_admin(member): return member.guild_permissions.administrator
 
+def log_memory():
+    print(f"[INFO] Memory: peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB, "
+          f"members intent {'on' if MEMBERS_INTENT else 'off'}, {len(client.guilds)} guilds, "
+          f"{sum(len(g.members) for g in client.guilds)} cached members, {len(client.users)} cached users, "
+          f"{len(dm_channels)} cached DM channels")
+
+async def send_dm(user_id, content):
+    # Only the DM channel ID is kept per subscriber (bounded LRU), not a User or Member object.
+    channel_id = dm_channels.pop(user_id, None)
+    if channel_id is None:
+        user = client.get_user(user_id)
+        channel = user.dm_channel if user else None
+        if channel is None:
+            channel = await client.create_dm(user or discord.Object(user_id))
+        channel_id = channel.id
+    dm_channels[user_id] = channel_id
+    if len(dm_channels) > DM_CHANNEL_CACHE_SIZE:
+        dm_channels.popitem(last=False)
+    await client.get_partial_messageable(channel_id, type=discord.ChannelType.private).send(content)
+
 async def fetch_series_list():
     try:
-        r = cloudscraper.create_scraper().get(GOOGLE_DRIVE_TXT_URL)
-        if r.status_code == 200:
-            return [line.strip() for line in r.text.splitlines() if line.strip()]
+        return await asyncio.wait_for(asyncio.to_thread(comick.fetch_lines, GOOGLE_DRIVE_TXT_URL), SCRAPE_TIMEOUT)
     except Exception as e:
-        print(f"[ERROR] Failed to fetch list: {e}")
+        print(f"[ERROR] Failed to fetch list: {e!r}")
     return []
 
+async def _refresh_catalog():
+    series = await fetch_series_list()
+    if series:
+        if series != series_catalog["series"]:
+            series_catalog["search"] = await asyncio.to_thread(SeriesSearch, series)
+        series_catalog["series"] = series
+        series_catalog["fetched_at"] = datetime.utcnow()
+    elif series_catalog["series"]:
+        print("[WARN] Series list refresh failed, keeping last known good copy")
+
+def refresh_catalog_in_background():
+    task = series_catalog["refresh"]
+    if task is None or task.done():
+        task = series_catalog["refresh"] = asyncio.create_task(_refresh_catalog())
+    return task
+
+async def get_series_list():
+    # Stale-while-revalidate: answer from the cached copy, refreshing behind it when it is old.
+    if not series_catalog["series"]:
+        await refresh_catalog_in_background()
+    elif datetime.utcnow() - series_catalog["fetched_at"] > timedelta(minutes=CATALOG_TTL_MINUTES):
+        refresh_catalog_in_background()
+    return series_catalog["series"]
+
+def choice_key(name):
+    # Discord caps choice values at 100 characters; longer titles are sent as a digest and resolved back.
+    return name if len(name) <= 100 else "#" + hashlib.blake2b(name.encode(), digest_size=8).hexdigest()
+
+def resolve_choice(value, names):
+    if value is None or len(value) != 17 or not value.startswith("#"):
+        return value
+    return next((name for name in names if len(name) > 100 and choice_key(name) == value), value)
+
+def autocomplete_choices(names):
+    return [app_commands.Choice(name=name[:100], value=choice_key(name)) for name in names[:25]]
+
+def filter_names(names, current):
+    # Small per-user / per-guild lists: a normalized substring scan is fast enough.
+    query = normalize(current)
+    return [name for name in sorted(names) if query in normalize(name)]
+
+async def catalog_autocomplete(interaction: discord.Interaction, current: str):
+    # Never wait on Google Drive inside the autocomplete deadline; answer from whatever is cached.
+    if not series_catalog["series"]:
+        refresh_catalog_in_background()
+    return autocomplete_choices(series_catalog["search"].search(current))
+
+async def my_series_autocomplete(interaction: discord.Interaction, current: str):
+    return autocomplete_choices(filter_names(notify_me.series_of(interaction.user.id), current))
+
+async def notify_all_autocomplete(interaction: discord.Interaction, current: str):
+    return autocomplete_choices(filter_names(notify_all, current))
+
+async def notify_roles_autocomplete(interaction: discord.Interaction, current: str):
+    return autocomplete_choices(filter_names(notify_roles, current))
+
+class SeriesPicker(discord.ui.View):
+    """Paginated select over the whole catalog, 25 series per page."""
+
+    PAGE_SIZE = 25
+
+    def __init__(self, series_list):
+        super().__init__(timeout=300)
+        self.series_list = sorted(series_list)
+        self.pages = max(1, -(-len(self.series_list) // self.PAGE_SIZE))
+        self.page = 0
+        self.select = discord.ui.Select(placeholder="Select a series...", min_values=1, max_values=1, row=0)
+        self.select.callback = self.on_select
+        self.add_item(self.select)
+        self.render()
+
+    def render(self):
+        start = self.page * self.PAGE_SIZE
+        self.select.options = [
+            discord.SelectOption(label=s[:100], value=str(i))
+            for i, s in enumerate(self.series_list[start:start + self.PAGE_SIZE], start)
+        ]
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    def prompt(self):
+        return f"Please choose a series to subscribe (page {self.page + 1}/{self.pages}):"
+
+    async def on_select(self, select_interaction: discord.Interaction):
+        selected_series = self.series_list[int(self.select.values[0])]
+        if not notify_me.subscribe(select_interaction.user.id, selected_series):
+            await select_interaction.response.edit_message(content=f"⚠️ You are already subscribed to **{selected_series}**.", view=None)
+        else:
+            store.add_subscriptions(select_interaction.user.id, [selected_series])
+            await select_interaction.response.edit_message(content=f"✅ Subscribed to **{selected_series}**.", view=None)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary, row=1)
+    async def previous_page(self, button_interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        self.render()
+        await button_interaction.response.edit_message(content=self.prompt(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, button_interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        self.render()
+        await button_interaction.response.edit_message(content=self.prompt(), view=self)
+
+@tasks.loop(minutes=CATALOG_TTL_MINUTES)
+async def refresh_catalog():
+    await refresh_catalog_in_background()
+
+@tasks.loop(seconds=SUBSCRIPTIONS_FLUSH_SECONDS)
+async def flush_subscriptions():
+    # Snapshot on the event loop so commands can't mutate the state mid-dump; write off it.
+    snapshot = store.snapshot()
+    if snapshot is not None:
+        await asyncio.to_thread(store.write, snapshot)
+        print(f"[INFO] Subscriptions flushed ({store.stats['writes']} writes, {store.stats['coalesced']} coalesced)")
+
+async def _sync_subscriptions():
+    # Other shard processes write to the same database; reload once they have committed anything. The reload
+    # reads on its own connection in a worker thread so a large table never stalls the gateway.
+    version = store.data_version()
+    if version == store_version:
+        return
+    mutations = store.stats["mutations"]
+    state = await asyncio.to_thread(store.load_detached)
+    if store.stats["mutations"] != mutations:
+        # A command here changed the store mid-load and may be missing from the copy; try again next time.
+        return
+    apply_subscriptions(state, version)
+    announce_channels.clear()
+    print(f"[INFO] Reloaded subscriptions changed by another process ({len(notify_me)} subscribers)")
+
+def sync_subscriptions():
+    task = subscription_sync["task"]
+    if task is None or task.done():
+        task = subscription_sync["task"] = asyncio.create_task(_sync_subscriptions())
+    return task
+
+@tasks.loop(seconds=SUBSCRIPTIONS_SYNC_SECONDS)
+async def sync_subscriptions_loop():
+    await sync_subscriptions()
+
+def resolve_announce_channel(guild):
+    # Resolved from local permission data and cached until a channel, role or the bot's member changes.
+    if guild.id not in announce_channels:
+        configured = guild.get_channel(notify_channels.get(guild.id, 0))
+        candidates = ([configured] if configured else []) + guild.text_channels
+        announce_channels[guild.id] = next(
+            (c for c in candidates if c.permissions_for(guild.me).view_channel and c.permissions_for(guild.me).send_messages), None)
+    return announce_channels[guild.id]
+
+def invalidate_announce_channel(guild):
+    announce_channels.pop(guild.id, None)
+
+def index_guild_roles(guild):
+    names = {}
+    for role in guild.roles:
+        names.setdefault(role.name, role)
+    role_index[guild.id] = names
+
+def resolve_role(guild, role):
+    if isinstance(role, int):
+        return guild.get_role(role)
+    return role_index.get(guild.id, {}).get(role)
+
+def migrate_role_names():
+    # Across processes each one only sees its own shards' guilds, so the name stays behind as a per-guild fallback
+    # (resolve_role looks it up in role_index) and is only dropped by a process that sees every guild.
+    drop_names = not MULTI_PROCESS
+    migrated = 0
+    for series, roles in notify_roles.items():
+        for name in [r for r in roles if isinstance(r, str)]:
+            ids = [names[name].id for names in role_index.values() if name in names]
+            if not ids:
+                continue
+            added = [role_id for role_id in ids if role_id not in roles]
+            for role_id in added:
+                roles.append(role_id)
+                store.add_notify_role(series, role_id)
+            if drop_names:
+                roles.remove(name)
+                store.remove_notify_role(series, name)
+            migrated += bool(added) or drop_names
+    if migrated:
+        print(f"[INFO] Migrated {migrated} role notification(s) from role names to role IDs")
+
+async def announce(guild, content):
+    channel = resolve_announce_channel(guild)
+    if channel is None:
+        print(f"[WARN] No writable channel in {guild.name}")
+        return
+    try:
+        await channel.send(content)
+    except (discord.Forbidden, discord.NotFound):
+        invalidate_announce_channel(guild)
+        raise
+
 @tasks.loop(minutes=1)
+async def report_delivery():
+    if delivery.depth() or delivery.throughput():
+        print(f"[INFO] Delivery: {delivery.throughput():.2f} msgs/s, queue depth {delivery.depth()}, "
+              f"sent {delivery.stats['sent']}, failed {delivery.stats['failed']}, retried {delivery.stats['retried']}")
+
+@tasks.loop(seconds=POLL_BASE_SECONDS)
 async def fetch_comics():
     await client.wait_until_ready()
     try:
-        scraper = cloudscraper.create_scraper()
-        response = scraper.get(COMICK_NEW_RELEASES_URL)
-        if response.status_code != 200:
-            print(f"[ERROR] Failed to fetch comics: HTTP {response.status_code}")
-            return
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        update_cards = []
-
-        updates_section = soup.find("h2", string=re.compile("Updates", re.IGNORECASE))
-        if updates_section:
-            container = updates_section.find_next("div")
-            if container:
-                update_cards = container.find_all("a", href=True)
-
-        if not update_cards:
-            for card in soup.find_all("a", href=True):
-                if card.find("p", class_="series-title") and card.find("p", class_="series-chapter") and card.find("time"):
-                    update_cards.append(card)
-
-        now = datetime.utcnow()
-        new_titles = []
-
-        for card in update_cards:
-            try:
-                title_tag = card.find("p", class_="series-title")
-                chapter_tag = card.find("p", class_="series-chapter")
-                time_tag = card.find("time")
-                if not (title_tag and chapter_tag and time_tag):
-                    continue
-
-                title = title_tag.text.strip()
-                chapter = chapter_tag.text.strip()
-                uploaded_time = datetime.fromisoformat(time_tag.get("datetime").replace("Z", "+00:00")).replace(tzinfo=None)
-
-                if now - uploaded_time > timedelta(minutes=COOLDOWN_MINUTES):
-                    continue
-
-                key = f"{title}|{chapter}"
-                if key in last_seen_titles:
-                    continue
-
-                last_seen_titles.add(key)
-                new_titles.append((title, chapter, uploaded_time.strftime("%H:%M UTC")))
-            except Exception as e:
-                print(f"[WARN] Error parsing comic card: {e}")
-
-        for guild in client.guilds:
-            for title, chapter, time_str in new_titles:
-                notify_text = f"📚 **{title}** — {chapter} *(Uploaded: {time_str})*"
-                for member in guild.members:
-                    try:
-                        if title in notify_me.get(member.id, set()):
-                            await member.send(notify_text)
-                    except Exception as e:
-                        print(f"[WARN] Failed to DM {member.name}: {e}")
-                if title in notify_all:
-                    for channel in guild.text_channels:
-                        try:
-                            await channel.send(f"@everyone\n{notify_text}")
-                            break
-                        except:
-                            continue
-                if title in notify_roles:
-                    for role_name in notify_roles[title]:
-                        role = discord.utils.get(guild.roles, name=role_name)
-                        if role:
-                            for channel in guild.text_channels:
-                                try:
-                                    await channel.send(f"{role.mention}\n{notify_text}")
-                                    break
-                                except:
-                                    continue
+        with metrics.timer("tick"):
+            outcome = await poll_comics()
     except Exception as e:
         print(f"[ERROR] Exception in fetch_comics: {e}")
+        outcome = "error"
+    record_tick(outcome)
+    if MULTI_PROCESS and RELEASE_SOURCE == "local":
+        # Followers never poll; this heartbeat is what keeps their /healthz and /stats current.
+        await event_bus.publish({"type": "tick", "outcome": outcome})
+    interval = poll_scheduler.record(outcome)
+    fetch_comics.change_interval(seconds=interval)
+    print(f"[INFO] Poll {outcome}, next poll in {interval:.0f}s")
+
+async def poll_comics():
+    outcome, new_releases = await poller.poll()
+    if outcome == "new":
+        await notify_releases(new_releases)
+    return outcome
+
+async def notify_releases(releases, delivered=None):
+    detected = datetime.utcnow()
+    for release in releases:
+        metrics.observe("detection_lag", (detected - release.uploaded_time).total_seconds())
+    if MULTI_PROCESS:
+        await sync_subscriptions()
+    with metrics.timer("match"):
+        notify_texts = notify.match_releases(releases, title_matcher, notify_me, notify_all, notify_roles)
+    if MULTI_PROCESS and RELEASE_SOURCE == "local":
+        # Only matched lines go out; every process resolves its own guilds and DM users.
+        await event_bus.publish({"type": "notify", "texts": [[sorted(names), text] for names, text in notify_texts if names]})
+    queue_notifications(notify_texts, delivered)
+
+def owns_user(user_id):
+    # DMs are spread over the processes the way Discord spreads guilds over shards.
+    return not MULTI_PROCESS or (user_id >> 22) % SHARD_COUNT in SHARD_IDS
+
+def record_tick(outcome):
+    metrics.inc(f"ticks_{outcome}")
+    if outcome != "error":
+        metrics.mark_success()
+
+async def on_bus_event(event):
+    if event.get("type") == "tick":
+        record_tick(event["outcome"])
+    elif event.get("type") == "notify":
+        await sync_subscriptions()
+        queue_notifications([(set(names), text) for names, text in event["texts"]])
+
+def load_release_cursor():
+    # received dedupes replays while a batch is pending; delivered is where a restart resumes from.
+    seq = None
+    if os.path.isfile(release_cursor_file):
+        try:
+            with open(release_cursor_file, "r") as f:
+                seq = json.load(f)["seq"]
+        except Exception as e:
+            print(f"[ERROR] Failed to load release cursor: {e}")
+    return {"received": seq, "delivered": seq}
+
+def save_release_cursor():
+    try:
+        tmp = release_cursor_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"seq": release_cursor["delivered"]}, f)
+        os.replace(tmp, release_cursor_file)
+    except Exception as e:
+        print(f"[ERROR] Failed to save release cursor: {e}")
+
+release_cursor = load_release_cursor()
+
+async def on_release_event(event):
+    if event.get("type") == "tick":
+        record_tick(event["outcome"])
+        # A pending batch still carries the old numbering; reset once it has gone out.
+        if release_cursor["received"] is not None and event["head"] < release_cursor["received"] and not pending_releases:
+            print(f"[WARN] Scraper daemon's event log restarted at {event['head']}, resetting release cursor")
+            release_cursor["received"] = release_cursor["delivered"] = event["head"]
+            save_release_cursor()
+        return
+    if event.get("type") != "release" or (release_cursor["received"] is not None and event["seq"] <= release_cursor["received"]):
+        return
+    release_cursor["received"] = event["seq"]
+    pending_releases.append((event["seq"], comick.Release(event["title"], event["chapter"], datetime.fromisoformat(event["uploaded"]), event["slug"])))
+    # Events arrive one release at a time; batch them so each recipient still gets one message per scrape.
+    if release_batch["task"] is None:
+        release_batch["task"] = asyncio.create_task(flush_release_events())
+
+async def flush_release_events():
+    # The only flusher: batches go out one at a time, a failed one stays pending for retry and the cursor only moves forward.
+    failures = 0
+    while pending_releases:
+        await asyncio.sleep(min(60, EVENT_BATCH_SECONDS * 2 ** failures))
+        # A replay after downtime can hold thousands of events; catch up in bounded batches like the local poller.
+        batch = pending_releases[:CATCHUP_BATCH_SIZE]
+        # Only counted as delivered once the fan-out has drained, so a restart mid fan-out replays the batch.
+        delivered = asyncio.get_running_loop().create_future()
+        try:
+            await notify_releases([release for _, release in batch], delivered)
+            await delivered
+        except Exception as e:
+            failures += 1
+            print(f"[ERROR] Failed to deliver {len(batch)} release events, retrying: {e}")
+            continue
+        failures = 0
+        del pending_releases[:len(batch)]
+        metrics.inc("new_titles", len(batch))
+        release_cursor["delivered"] = max(release_cursor["delivered"] or 0, batch[-1][0])
+        save_release_cursor()
+    release_batch["task"] = None
+
+def queue_notifications(notify_texts, delivered=None):
+    # delivered, if given, resolves once every message for this batch has been sent or given up on.
+    notify_batches.put_nowait((notify_texts, delivered))
+    if dispatcher["task"] is None or dispatcher["task"].done():
+        dispatcher["task"] = asyncio.create_task(dispatch_notifications())
+
+async def dispatch_notifications():
+    # Fan-out waits on the bounded delivery queue here, one batch at a time and in order, never in the poll loop.
+    while True:
+        notify_texts, delivered = await notify_batches.get()
+        batch = delivery.batch(delivered)
+        try:
+            await deliver_matched(notify_texts, batch)
+        except Exception as e:
+            print(f"[ERROR] Failed to fan out notifications: {e}")
+            if delivered is not None and not delivered.done():
+                delivered.set_exception(e)
+        finally:
+            batch.close()
+            notify_batches.task_done()
+
+async def deliver_matched(notify_texts, queue=None):
+    with metrics.timer("plan"):
+        # DMs are fanned out once per user, not once per guild the user shares with the bot.
+        dms = notify.plan_dms(notify_texts, notify_me, owns_user if MULTI_PROCESS else None)
+    with metrics.timer("fanout"):
+        # With the member cache, users no longer sharing a guild with the bot are skipped up front. Across processes
+        # a user's guilds may all sit on another process's shards, so the owning process sends regardless.
+        reachable = (lambda user_id: client.get_user(user_id) is not None) if MEMBERS_INTENT and not MULTI_PROCESS else None
+        recipients, messages = await notify.fan_out(
+            queue or delivery, notify_texts, dms, client.guilds, notify_all, notify_roles, resolve_role, send_dm, announce, reachable
+        )
+    metrics.inc("recipients", recipients)
+    metrics.inc("messages_queued", messages)
+
+@client.event
+async def on_guild_channel_create(channel):
+    invalidate_announce_channel(channel.guild)
+
+@client.event
+async def on_guild_channel_delete(channel):
+    invalidate_announce_channel(channel.guild)
+
+@client.event
+async def on_guild_channel_update(before, after):
+    invalidate_announce_channel(after.guild)
+
+@client.event
+async def on_guild_role_create(role):
+    index_guild_roles(role.guild)
+
+@client.event
+async def on_guild_role_delete(role):
+    index_guild_roles(role.guild)
+
+@client.event
+async def on_guild_role_update(before, after):
+    index_guild_roles(after.guild)
+    invalidate_announce_channel(after.guild)
+
+@client.event
+async def on_guild_join(guild):
+    index_guild_roles(guild)
+
+@client.event
+async def on_member_update(before, after):
+    if after.id == client.user.id:
+        invalidate_announce_channel(after.guild)
+
+@client.event
+async def on_guild_remove(guild):
+    invalidate_announce_channel(guild)
+    role_index.pop(guild.id, None)
 
 @client.event
 async def on_ready():
-    await tree.sync()
-    fetch_comics.start()
+    if SCRAPE_LEADER:
+        await tree.sync()
+    for guild in client.guilds:
+        index_guild_roles(guild)
+    migrate_role_names()
+    log_memory()
+    if not refresh_catalog.is_running():
+        refresh_catalog.start()
+    if not flush_subscriptions.is_running():
+        flush_subscriptions.start()
+    delivery.start()
+    if not report_delivery.is_running():
+        report_delivery.start()
+    if METRICS_PORT and metrics_server["server"] is None:
+        try:
+            metrics_server["server"] = await pipeline_metrics.serve(metrics, "127.0.0.1", METRICS_PORT, MAX_TICK_AGE_SECONDS)
+            print(f"[INFO] Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"[ERROR] Failed to start metrics server: {e}")
+    if MULTI_PROCESS and not sync_subscriptions_loop.is_running():
+        sync_subscriptions_loop.start()
+    if RELEASE_SOURCE == "daemon":
+        if bus_follower["task"] is None:
+            bus_follower["task"] = asyncio.create_task(
+                events.follow(SCRAPER_DAEMON_HOST, SCRAPER_DAEMON_PORT, on_release_event, lambda: release_cursor["received"]))
+        print(f"{client.user} is online, delivering releases from the scraper daemon at {SCRAPER_DAEMON_HOST}:{SCRAPER_DAEMON_PORT}.")
+        return
+    if not SCRAPE_LEADER:
+        if bus_follower["task"] is None:
+            bus_follower["task"] = asyncio.create_task(events.follow(EVENT_BUS_HOST, EVENT_BUS_PORT, on_bus_event))
+        print(f"{client.user} is online (shards {SHARD_IDS} of {SHARD_COUNT}), delivering events from the scrape leader.")
+        return
+    if MULTI_PROCESS and event_bus.server is None:
+        await event_bus.start(EVENT_BUS_HOST, EVENT_BUS_PORT)
+        print(f"[INFO] Publishing matched releases on {EVENT_BUS_HOST}:{EVENT_BUS_PORT}")
+    if not fetch_comics.is_running():
+        fetch_comics.start()
     print(f"{client.user} is online and slash commands are synced.")
 
 # ─── SLASH COMMANDS ─────────────────────────────────────────────
 
 @tree.command(name="notifyme", description="Subscribe to notifications for a specific series")
-async def notifyme(interaction: discord.Interaction):
-    series_list = await fetch_series_list()
+@app_commands.describe(series="Series to subscribe to (leave empty to browse the full list)")
+@app_commands.autocomplete(series=catalog_autocomplete)
+async def notifyme(interaction: discord.Interaction, series: str = None):
+    series_list = await get_series_list()
     if not series_list:
         await interaction.response.send_message("❌ No series available to subscribe.", ephemeral=True)
         return
 
-    # Limit options to 25 (Discord's max) and sort the series list
-    display_series = sorted(series_list)
-    if len(display_series) > 25:
-        display_series = display_series[:25]
-        prompt = "Please choose a series to subscribe (showing first 25)."
-    else:
-        prompt = "Please choose a series to subscribe:"
-    options = [discord.SelectOption(label=s, value=s) for s in display_series]
-
-    class SeriesSelect(discord.ui.Select):
-        def __init__(self):
-            super().__init__(placeholder="Select a series...", min_values=1, max_values=1, options=options)
-        async def callback(self, select_interaction: discord.Interaction):
-            selected_series = self.values[0]
-            user_series = notify_me.setdefault(select_interaction.user.id, set())
-            if selected_series in user_series:
-                await select_interaction.response.edit_message(content=f"⚠️ You are already subscribed to **{selected_series}**.", view=None)
-            else:
-                user_series.add(selected_series)
-                save_subscriptions()  # Save updated subscriptions to file
-                await select_interaction.response.edit_message(content=f"✅ Subscribed to **{selected_series}**.", view=None)
+    if series is not None:
+        series = resolve_choice(series, series_list)
+        if series not in series_list:
+            await interaction.response.send_message("❌ That series is not in the list. Pick one of the suggestions.", ephemeral=True)
+        elif not notify_me.subscribe(interaction.user.id, series):
+            await interaction.response.send_message(f"⚠️ You are already subscribed to **{series}**.", ephemeral=True)
+        else:
+            store.add_subscriptions(interaction.user.id, [series])
+            await interaction.response.send_message(f"✅ Subscribed to **{series}**.", ephemeral=True)
+        return
 
-    view = discord.ui.View()
-    view.add_item(SeriesSelect())
-    await interaction.response.send_message(prompt, view=view, ephemeral=True)
+    view = SeriesPicker(series_list)
+    await interaction.response.send_message(view.prompt(), view=view, ephemeral=True)
 
 @tree.command(name="help", description="Interactive help menu")
 async def help(interaction: discord.Interaction):
@@ -190,7 +619,7 @@ async def help(interaction: discord.Interaction):
     class CommandDropdown(discord.ui.Select):
         def __init__(self):
             options = [
-                discord.SelectOption(emoji="🔔", label="Subscribe", value="subscribe", description="/notifyme"),
+                discord.SelectOption(emoji="🔔", label="Subscribe", value="subscribe", description="/notifyme [series]"),
                 discord.SelectOption(emoji="🚫", label="Unsubscribe", value="unsubscribe", description="/removeseries [series]"),
                 discord.SelectOption(emoji="📃", label="My Series", value="myseries", description="List your subscriptions"),
                 discord.SelectOption(emoji="📄", label="Available Series", value="availableseries", description="All subscribable series"),
@@ -200,7 +629,7 @@ async def help(interaction: discord.Interaction):
         async def callback(self, interaction_select: discord.Interaction):
             choice = self.values[0]
             if choice == "subscribe":
-                await interaction_select.response.send_message("Use `/notifyme` to subscribe to a series via a dropdown selection.", ephemeral=True)
+                await interaction_select.response.send_message("Use `/notifyme [series]` to subscribe to a series; start typing for suggestions, or leave it empty to browse the full list page by page.", ephemeral=True)
             elif choice == "unsubscribe":
                 await interaction_select.response.send_message("Use `/removeseries [series]` to unsubscribe from a series, or `/unsubscribeall` to unsubscribe from all series.", ephemeral=True)
             elif choice == "myseries":
@@ -216,6 +645,8 @@ async def help(interaction: discord.Interaction):
                     "`/removenotifyrole`\n"
                     "`/subscribemeall`\n"
                     "`/removeseriesfromuser`\n"
+                    "`/setnotifychannel`\n"
+                    "`/stats`\n"
                     "`/restartbot`"
                 )
                 await interaction_select.response.send_message(admin_cmds_msg, ephemeral=True)
@@ -227,7 +658,7 @@ async def help(interaction: discord.Interaction):
     embed = discord.Embed(title="📘 ChapterSniffer Help Menu", color=0x5865F2)
     embed.add_field(name="👤 User Commands", value=(
         "• `/help` - Show this help menu\n"
-        "• `/notifyme` - Subscribe to a series\n"
+        "• `/notifyme [series]` - Subscribe to a series\n"
         "• `/removeseries [series]` - Unsubscribe from a series\n"
         "• `/unsubscribeall` - Unsubscribe from all series\n"
         "• `/myseries` - List your subscribed series\n"
@@ -241,6 +672,8 @@ async def help(interaction: discord.Interaction):
         "• `/removenotifyrole [series] [role]` - Remove role notifications for a series\n"
         "• `/subscribemeall` - Subscribe yourself to all series\n"
         "• `/removeseriesfromuser [user]` - Remove a series from a user's subscriptions\n"
+        "• `/setnotifychannel [channel]` - Set the channel for @everyone/role notifications\n"
+        "• `/stats` - Show scraper and delivery statistics\n"
         "• `/restartbot` - Restart the bot"
     ), inline=False)
     embed.set_footer(text="Use the dropdown below to view command usage details.")
@@ -248,11 +681,11 @@ async def help(interaction: discord.Interaction):
 
 @tree.command(name="removeseries", description="Unsubscribe from a specific series")
 @app_commands.describe(series="Exact name of the series")
+@app_commands.autocomplete(series=my_series_autocomplete)
 async def removeseries(interaction: discord.Interaction, series: str):
-    user_series = notify_me.get(interaction.user.id, set())
-    if series in user_series:
-        user_series.remove(series)
-        save_subscriptions()  # Save updated subscriptions to file
+    series = resolve_choice(series, notify_me.series_of(interaction.user.id))
+    if notify_me.unsubscribe(interaction.user.id, series):
+        store.remove_subscriptions(interaction.user.id, [series])
         await interaction.response.send_message(f"✅ Removed **{series}** from your list.", ephemeral=True)
     else:
         await interaction.response.send_message("You were not subscribed to this series.", ephemeral=True)
@@ -260,17 +693,16 @@ async def removeseries(interaction: discord.Interaction, series: str):
 # New command to unsubscribe user from all series at once
 @tree.command(name="unsubscribeall", description="Unsubscribe from all series")
 async def unsubscribeall(interaction: discord.Interaction):
-    user_series = notify_me.get(interaction.user.id, set())
-    if not user_series:
+    if interaction.user.id not in notify_me:
         await interaction.response.send_message("You are not subscribed to any series.", ephemeral=True)
     else:
-        user_series.clear()
-        save_subscriptions()  # Persist the updated subscription list
+        notify_me.unsubscribe_all(interaction.user.id)
+        store.remove_user(interaction.user.id)
         await interaction.response.send_message("✅ Removed all series from your list.", ephemeral=True)
 
 @tree.command(name="myseries", description="See all series you're subscribed to")
 async def myseries(interaction: discord.Interaction):
-    user_series = notify_me.get(interaction.user.id, set())
+    user_series = notify_me.series_of(interaction.user.id)
     if not user_series:
         await interaction.response.send_message("You are not subscribed to any series.", ephemeral=True)
     else:
@@ -279,7 +711,7 @@ async def myseries(interaction: discord.Interaction):
 
 @tree.command(name="availableseries", description="List all series available to subscribe")
 async def availableseries(interaction: discord.Interaction):
-    series_list = await fetch_series_list()
+    series_list = await get_series_list()
     if not series_list:
         await interaction.response.send_message("❌ No series available.", ephemeral=True)
         return
@@ -297,54 +729,64 @@ async def availableseries(interaction: discord.Interaction):
 
 @tree.command(name="addnotifyall", description="(Admin) Notify @everyone for a series")
 @app_commands.describe(series="Series to ping @everyone for")
+@app_commands.autocomplete(series=catalog_autocomplete)
 async def addnotifyall(interaction: discord.Interaction, series: str):
     if not is_admin(interaction.user):
         await interaction.response.send_message("You must be an admin to use this.", ephemeral=True)
         return
+    series = resolve_choice(series, await get_series_list())
     notify_all.add(series)
-    save_subscriptions()
+    store.add_notify_all(series)
     await interaction.response.send_message(f"✅ Now notifying @everyone for **{series}**.", ephemeral=True)
 
 @tree.command(name="removenotifyall", description="(Admin) Stop @everyone notifications for a series")
 @app_commands.describe(series="Series to stop notifying @everyone")
+@app_commands.autocomplete(series=notify_all_autocomplete)
 async def removenotifyall(interaction: discord.Interaction, series: str):
     if not is_admin(interaction.user):
         await interaction.response.send_message("You must be an admin to use this.", ephemeral=True)
         return
+    series = resolve_choice(series, notify_all)
     if series in notify_all:
         notify_all.discard(series)
-        save_subscriptions()
+        store.remove_notify_all(series)
         await interaction.response.send_message(f"✅ Removed @everyone for **{series}**.", ephemeral=True)
     else:
         await interaction.response.send_message("❌ That series was not set to notify @everyone.", ephemeral=True)
 
 @tree.command(name="addnotifyrole", description="(Admin) Notify a role for a series")
-@app_commands.describe(series="Series to notify", role="Role name to ping")
-async def addnotifyrole(interaction: discord.Interaction, series: str, role: str):
+@app_commands.describe(series="Series to notify", role="Role to ping")
+@app_commands.autocomplete(series=catalog_autocomplete)
+async def addnotifyrole(interaction: discord.Interaction, series: str, role: discord.Role):
     if not is_admin(interaction.user):
         await interaction.response.send_message("You must be an admin to use this.", ephemeral=True)
         return
+    series = resolve_choice(series, await get_series_list())
     roles_list = notify_roles.setdefault(series, [])
-    if role not in roles_list:
-        roles_list.append(role)
-        save_subscriptions()
+    if role.id not in roles_list:
+        roles_list.append(role.id)
+        store.add_notify_role(series, role.id)
         await interaction.response.send_message(f"✅ Added role `{role}` for **{series}** notifications.", ephemeral=True)
     else:
         await interaction.response.send_message(f"⚠️ Role `{role}` is already receiving notifications for **{series}**.", ephemeral=True)
 
 @tree.command(name="removenotifyrole", description="(Admin) Remove a role from notifications")
 @app_commands.describe(series="Series", role="Role to remove")
-async def removenotifyrole(interaction: discord.Interaction, series: str, role: str):
+@app_commands.autocomplete(series=notify_roles_autocomplete)
+async def removenotifyrole(interaction: discord.Interaction, series: str, role: discord.Role):
     if not is_admin(interaction.user):
         await interaction.response.send_message("You must be an admin to use this.", ephemeral=True)
         return
+    series = resolve_choice(series, notify_roles)
     roles_list = notify_roles.get(series, [])
-    if role in roles_list:
-        while role in roles_list:
-            roles_list.remove(role)
+    refs = [r for r in (role.id, role.name) if r in roles_list]
+    if refs:
+        for ref in refs:
+            while ref in roles_list:
+                roles_list.remove(ref)
+            store.remove_notify_role(series, ref)
         if not roles_list:
             del notify_roles[series]
-        save_subscriptions()
         await interaction.response.send_message(f"✅ Removed role `{role}` from **{series}**.", ephemeral=True)
     else:
         await interaction.response.send_message("❌ That role was not being notified for this series.", ephemeral=True)
@@ -358,7 +800,7 @@ async def othernotifications(interaction: discord.Interaction):
     if filtered_roles:
         desc.append("**Role-based:**")
         for s, roles in filtered_roles.items():
-            desc.append(f"- {s} → {', '.join(roles)}")
+            desc.append(f"- {s} → {', '.join(f'<@&{r}>' if isinstance(r, int) else r for r in roles)}")
     if not desc:
         await interaction.response.send_message("There are no public notifications set.", ephemeral=True)
     else:
@@ -371,20 +813,14 @@ async def subscribemeall(interaction: discord.Interaction):
         await interaction.response.send_message("❌ You must be an admin to use this command.", ephemeral=True)
         return
 
-    series_list = await fetch_series_list()
-    user_series = notify_me.setdefault(interaction.user.id, set())
-    added = 0
-    for series in series_list:
-        if series not in user_series:
-            user_series.add(series)
-            added += 1
-
-    if added > 0:
-        save_subscriptions()  # Save subscription updates to file
+    series_list = await get_series_list()
+    added = [series for series in series_list if notify_me.subscribe(interaction.user.id, series)]
+    if added:
+        store.add_subscriptions(interaction.user.id, added)
 
     embed = discord.Embed(
         title="📥 Bulk Subscription",
-        description=f"You have been subscribed to **{added}** new series.",
+        description=f"You have been subscribed to **{len(added)}** new series.",
         color=0x3498db
     )
     await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -397,7 +833,7 @@ async def removeseriesfromuser(interaction: discord.Interaction, user_id: str):
         return
     try:
         user_id = int(user_id)
-        user_series = notify_me.get(user_id, set())
+        user_series = notify_me.series_of(user_id)
         if not user_series:
             await interaction.response.send_message("User has no subscriptions.", ephemeral=True)
             return
@@ -409,10 +845,8 @@ async def removeseriesfromuser(interaction: discord.Interaction, user_id: str):
 
             async def callback(self, i: discord.Interaction):
                 s = self.values[0]
-                notify_me[user_id].remove(s)
-                if not notify_me[user_id]:
-                    del notify_me[user_id]
-                save_subscriptions()
+                notify_me.unsubscribe(user_id, s)
+                store.remove_subscriptions(user_id, [s])
                 await i.response.send_message(f"✅ Removed **{s}** from user {user_id}.", ephemeral=True)
 
         view = discord.ui.View()
@@ -421,6 +855,55 @@ async def removeseriesfromuser(interaction: discord.Interaction, user_id: str):
     except Exception as e:
         await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
 
+@tree.command(name="setnotifychannel", description="(Admin) Set the channel for @everyone/role notifications")
+@app_commands.describe(channel="Channel to post in (leave empty to pick automatically)")
+async def setnotifychannel(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    if not is_admin(interaction.user):
+        await interaction.response.send_message("❌ Admin only command.", ephemeral=True)
+        return
+    if channel is None:
+        notify_channels.pop(interaction.guild.id, None)
+        store.set_notify_channel(interaction.guild.id, None)
+        message = "✅ Notifications will go to the first channel I can post in."
+    else:
+        perms = channel.permissions_for(interaction.guild.me)
+        if not (perms.view_channel and perms.send_messages):
+            await interaction.response.send_message(f"❌ I can't send messages in {channel.mention}.", ephemeral=True)
+            return
+        notify_channels[interaction.guild.id] = channel.id
+        store.set_notify_channel(interaction.guild.id, channel.id)
+        message = f"✅ Notifications will be posted in {channel.mention}."
+    invalidate_announce_channel(interaction.guild)
+    await interaction.response.send_message(message, ephemeral=True)
+
+@tree.command(name="stats", description="(Admin) Show scraper and delivery statistics")
+async def stats(interaction: discord.Interaction):
+    if not is_admin(interaction.user):
+        await interaction.response.send_message("❌ Admin only command.", ephemeral=True)
+        return
+    counters, gauges, stages = metrics.snapshot()
+    age = gauges["last_success_age_seconds"]
+    embed = discord.Embed(title="📊 Bot Statistics", color=0x95a5a6 if age <= MAX_TICK_AGE_SECONDS else 0xe74c3c)
+    embed.add_field(name="Scraper", value=(
+        f"Last successful tick: {age:.0f}s ago\n"
+        f"Next poll in: {gauges['poll_interval_seconds']:.0f}s\n"
+        f"Pages processed/skipped: {counters.get('pages_processed', 0)}/{counters.get('pages_skipped', 0)}\n"
+        f"Errors: {counters.get('ticks_error', 0)}\n"
+        f"Cards parsed: {counters.get('cards_parsed', 0)}\n"
+        f"New titles: {counters.get('new_titles', 0)} ({gauges['backlog_releases']} queued)"
+    ), inline=False)
+    embed.add_field(name="Delivery", value=(
+        f"Recipients: {counters.get('recipients', 0)}\n"
+        f"Sent/failed/retried: {gauges['delivery_sent']}/{gauges['delivery_failed']}/{gauges['delivery_retried']}\n"
+        f"Rate-limit waits: {gauges['delivery_rate_limit_wait_seconds']:.1f}s\n"
+        f"Queue depth: {gauges['delivery_queue_depth']} ({gauges['delivery_messages_per_second']:.2f} msgs/s)"
+    ), inline=False)
+    if stages:
+        embed.add_field(name="Stage timings (last / avg)", value="\n".join(
+            f"{stage}: {last * 1000:.0f} / {total / count * 1000:.0f} ms" for stage, (last, total, count) in sorted(stages.items())
+        ), inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @tree.command(name="restartbot", description="(Admin) Restarts the bot")
 async def restartbot(interaction: discord.Interaction):
     if not is_admin(interaction.user):
@@ -438,6 +921,11 @@ async def restartbot(interaction: discord.Interaction):
         print(f"[ERROR] Failed to restart bot: {e}")
         await interaction.edit_original_response(content="⚠️ Restart failed.")
         return
+    store.flush()
     await client.close()
 
-client.run(TOKEN)
\ No newline at end of file
+signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+try:
+    client.run(TOKEN)
+finally:
+    store.close()
\ No newline at end of file
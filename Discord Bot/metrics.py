@@ -0,0 +1,100 @@
+import time
+import asyncio
+from contextlib import contextmanager
+
+class Metrics:
+    """Counters, gauges and per-stage timings for the scrape -> notify pipeline.
+
+    Rendered in the Prometheus text format; collectors registered with
+    collect() add values owned by other components (e.g. the delivery queue)
+    at render time.
+    """
+
+    def __init__(self, prefix="comick"):
+        self.prefix = prefix
+        self.counters = {}
+        self.gauges = {}
+        self.stages = {}
+        self.collectors = []
+        self.last_success = None
+        self.started = time.time()
+
+    def inc(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        self.gauges[name] = value
+
+    def collect(self, collector):
+        self.collectors.append(collector)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe(self, stage, seconds):
+        last, total, count = self.stages.get(stage, (0.0, 0.0, 0))
+        self.stages[stage] = (seconds, total + seconds, count + 1)
+
+    def mark_success(self):
+        self.last_success = time.time()
+
+    def last_success_age(self):
+        return time.time() - (self.last_success or self.started)
+
+    def snapshot(self):
+        gauges = dict(self.gauges)
+        for collector in self.collectors:
+            gauges.update(collector())
+        gauges["last_success_age_seconds"] = self.last_success_age()
+        return dict(self.counters), gauges, dict(self.stages)
+
+    def render(self):
+        counters, gauges, stages = self.snapshot()
+        lines = []
+        for name, value in sorted(counters.items()):
+            lines += [f"# TYPE {self.prefix}_{name}_total counter", f"{self.prefix}_{name}_total {value}"]
+        for name, value in sorted(gauges.items()):
+            lines += [f"# TYPE {self.prefix}_{name} gauge", f"{self.prefix}_{name} {value}"]
+        if stages:
+            # Each metric family's samples have to stay together under its TYPE line.
+            lines.append(f"# TYPE {self.prefix}_stage_seconds summary")
+            for stage, (last, total, count) in sorted(stages.items()):
+                lines += [
+                    f'{self.prefix}_stage_seconds_sum{{stage="{stage}"}} {total:.6f}',
+                    f'{self.prefix}_stage_seconds_count{{stage="{stage}"}} {count}',
+                ]
+            lines.append(f"# TYPE {self.prefix}_stage_last_seconds gauge")
+            lines += [f'{self.prefix}_stage_last_seconds{{stage="{stage}"}} {last:.6f}' for stage, (last, _, _) in sorted(stages.items())]
+        return "\n".join(lines) + "\n"
+
+async def serve(metrics, host, port, max_tick_age):
+    """Serve /metrics (Prometheus text) and /healthz (503 once the last good tick is older than max_tick_age seconds)."""
+
+    async def handle(reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request.split()[1].decode() if len(request.split()) > 1 else "/"
+            if path == "/metrics":
+                status, body = "200 OK", metrics.render()
+            elif path == "/healthz":
+                age = metrics.last_success_age()
+                status = "200 OK" if age <= max_tick_age else "503 Service Unavailable"
+                body = f"last successful tick {age:.0f}s ago\n"
+            else:
+                status, body = "404 Not Found", "not found\n"
+            payload = body.encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
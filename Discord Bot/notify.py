@@ -0,0 +1,65 @@
+from delivery import split_message
+
+def release_line(release):
+    return f"📚 **{release.title}** — {release.chapter} *(Uploaded: {release.uploaded_time:%H:%M} UTC)*"
+
+def match_releases(releases, matcher, notify_me, notify_all, notify_roles):
+    """Pair each release's notification line with the set of stored series names it matches."""
+    # Scraped titles are matched on normalized keys, aliases and slugs against every name series are stored under.
+    matcher.sync(notify_me)
+    matcher.update(notify_all)
+    matcher.update(notify_roles)
+    return [(matcher.match(r.title, r.slug), release_line(r)) for r in releases]
+
+def plan_dms(notify_texts, notify_me, owns=None):
+    """{user_id: [lines]}; a user subscribed under several matching names gets each line once.
+
+    With owns, only users for whom owns(user_id) is true are planned.
+    """
+    dms = {}
+    for names, notify_text in notify_texts:
+        for user_id in {user_id for name in names for user_id in notify_me.subscribers_of(name)}:
+            if owns is None or owns(user_id):
+                dms.setdefault(user_id, []).append(notify_text)
+    return dms
+
+def plan_guild(notify_texts, notify_all, notify_roles, resolve_role):
+    """Lines to ping @everyone with and {role: [lines]} for one guild; resolve_role(ref) returns a role or None."""
+    everyone = []
+    by_role = {}
+    for names, notify_text in notify_texts:
+        if not names.isdisjoint(notify_all):
+            everyone.append(notify_text)
+        # A role can be stored both by ID and by name; it is pinged once.
+        for role in {resolve_role(r) for name in names for r in notify_roles.get(name, ())}:
+            if role:
+                by_role.setdefault(role, []).append(notify_text)
+    return everyone, by_role
+
+async def fan_out(queue, notify_texts, dms, guilds, notify_all, notify_roles, resolve_role, send_dm, announce, reachable=None):
+    """Queue one DM per user and one announcement per mention target per guild.
+
+    Coalesced per tick: however many titles updated, each recipient gets as
+    few messages as fit the length limit. Users for whom reachable(user_id)
+    is false are skipped. Returns (recipients, messages queued).
+    """
+    recipients = messages = 0
+    for user_id, lines in dms.items():
+        if reachable and not reachable(user_id):
+            continue
+        recipients += 1
+        for content in split_message(lines):
+            messages += 1
+            await queue.put(("user", user_id), send_dm, user_id, content)
+
+    for guild in guilds:
+        everyone, by_role = plan_guild(notify_texts, notify_all, notify_roles, lambda ref: resolve_role(guild, ref))
+        recipients += bool(everyone) + len(by_role)
+        for content in split_message(everyone, "@everyone"):
+            messages += 1
+            await queue.put(("guild", guild.id), announce, guild, content)
+        for role, lines in by_role.items():
+            for content in split_message(lines, role.mention):
+                messages += 1
+                await queue.put(("guild", guild.id), announce, guild, content)
+    return recipients, messages
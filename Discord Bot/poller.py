@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import comick
+
+class ReleasePoller:
+    """Scrape, parse and dedupe stage: turns polls of the new-releases page into new Release records.
+
+    Releases newer than the dedupe window's high-water mark are queued in a
+    backlog and handed out oldest first in batches, so a long outage doesn't
+    flood delivery and the high-water mark only moves forward.
+    """
+
+    def __init__(self, url, page_url, dedupe, metrics, cooldown_minutes=10, timeout=45,
+                 catchup_max_hours=24, catchup_max_pages=10, batch_size=25):
+        self.url = url
+        self.page_url = page_url
+        self.dedupe = dedupe
+        self.metrics = metrics
+        self.cooldown = timedelta(minutes=cooldown_minutes)
+        self.timeout = timeout
+        self.catchup_max_hours = catchup_max_hours
+        self.catchup_max_pages = catchup_max_pages
+        self.batch_size = batch_size
+        self.backlog = []
+        self.backlog_keys = set()
+
+    async def poll(self):
+        """One poll; returns (outcome, new releases) with outcome "error", "unchanged", "changed" or "new"."""
+        try:
+            with self.metrics.timer("fetch"):
+                status, html, validators = await asyncio.wait_for(asyncio.to_thread(comick.fetch_if_changed, self.url), self.timeout)
+        except asyncio.TimeoutError:
+            print(f"[ERROR] Failed to fetch comics: timed out after {self.timeout}s")
+            return "error", []
+        if status != 200:
+            print(f"[ERROR] Failed to fetch comics: HTTP {status}")
+            return "error", []
+        if html is None:
+            self.metrics.inc("pages_skipped")
+        else:
+            self.metrics.inc("pages_processed")
+            print(f"[INFO] New releases page changed (processed: {self.metrics.counters['pages_processed']}, skipped unchanged: {self.metrics.counters.get('pages_skipped', 0)})")
+            await self._queue(html)
+            # Only now, so a page whose parse or catch-up walk failed is fetched and processed again next tick.
+            comick.commit_validators(self.url, validators)
+
+        if not self.backlog:
+            return ("unchanged" if html is None else "changed"), []
+        batch = self.backlog[:self.batch_size]
+        del self.backlog[:self.batch_size]
+        new_releases = []
+        for release in batch:
+            key = f"{release.title}|{release.chapter}"
+            self.backlog_keys.discard(key)
+            if self.dedupe.add(key, release.uploaded_time):
+                new_releases.append(release)
+            self.dedupe.advance(release.uploaded_time)
+        self.dedupe.save()
+        self.metrics.inc("new_titles", len(new_releases))
+        if self.backlog:
+            print(f"[INFO] Catching up: {len(self.backlog)} releases still queued (high-water mark {self.dedupe.high_water:%Y-%m-%d %H:%M} UTC)")
+        return "new", new_releases
+
+    async def _queue(self, html):
+        now = datetime.utcnow()
+        cutoff = now - self.cooldown
+        since = cutoff
+        if self.dedupe.high_water is not None:
+            since = min(cutoff, max(self.dedupe.high_water, now - timedelta(hours=self.catchup_max_hours)))
+        with self.metrics.timer("parse"):
+            updates = await asyncio.wait_for(asyncio.to_thread(comick.parse_updates, html, since), self.timeout)
+
+        # After downtime the gap can reach past the first page; walk back until the high-water mark is covered.
+        page = 1
+        while updates and min(u.uploaded_time for u in updates) > since and page < self.catchup_max_pages:
+            page += 1
+            with self.metrics.timer("fetch"):
+                status, text = await asyncio.wait_for(asyncio.to_thread(comick.fetch, self.page_url.format(page=page)), self.timeout)
+            if status != 200:
+                print(f"[WARN] Failed to fetch new releases page {page}: HTTP {status}")
+                break
+            with self.metrics.timer("parse"):
+                older = await asyncio.wait_for(asyncio.to_thread(comick.parse_updates, text, since), self.timeout)
+            if not older:
+                break
+            updates.extend(older)
+
+        self.metrics.inc("cards_parsed", len(updates))
+        self.dedupe.evict(cutoff)
+        for release in updates:
+            key = f"{release.title}|{release.chapter}"
+            if release.uploaded_time >= since and key not in self.dedupe and key not in self.backlog_keys:
+                self.backlog.append(release)
+                self.backlog_keys.add(key)
+        self.backlog.sort(key=lambda r: r.uploaded_time)
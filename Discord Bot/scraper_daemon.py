@@ -0,0 +1,77 @@
+import os
+import sys
+import signal
+import asyncio
+from dotenv import load_dotenv
+
+import comick
+import events
+import metrics as pipeline_metrics
+from poller import ReleasePoller
+
+# Standalone scrape/parse/dedupe worker. Publishes every new release as a numbered event on a local socket;
+# bots started with RELEASE_SOURCE=daemon consume them, so either side can restart without the other noticing.
+
+load_dotenv()
+COMICK_NEW_RELEASES_URL = os.getenv("COMICK_NEW_RELEASES_URL", "https://comick.io/home2#view=\"new\"")
+COMICK_NEW_RELEASES_PAGE_URL = os.getenv("COMICK_NEW_RELEASES_PAGE_URL", "https://comick.io/home2?page={page}")
+SCRAPER_DAEMON_HOST = os.getenv("SCRAPER_DAEMON_HOST", "127.0.0.1")
+SCRAPER_DAEMON_PORT = int(os.getenv("SCRAPER_DAEMON_PORT", "8766"))
+COOLDOWN_MINUTES = 10
+SCRAPE_TIMEOUT = 45
+POLL_BASE_SECONDS = int(os.getenv("POLL_BASE_SECONDS", "60"))
+POLL_FLOOR_SECONDS = int(os.getenv("POLL_FLOOR_SECONDS", "20"))
+POLL_CEILING_SECONDS = int(os.getenv("POLL_CEILING_SECONDS", "300"))
+POLL_ERROR_CEILING_SECONDS = int(os.getenv("POLL_ERROR_CEILING_SECONDS", "900"))
+METRICS_PORT = int(os.getenv("DAEMON_METRICS_PORT", "9109"))
+EVENT_LOG_SIZE = 2000
+event_log_file = "release_events.jsonl"
+
+def release_event(release):
+    return {
+        "type": "release",
+        "title": release.title,
+        "chapter": release.chapter,
+        "slug": release.slug,
+        "uploaded": release.uploaded_time.isoformat(),
+    }
+
+async def run():
+    metrics = pipeline_metrics.Metrics()
+    poller = ReleasePoller(COMICK_NEW_RELEASES_URL, COMICK_NEW_RELEASES_PAGE_URL, comick.DedupeWindow(COOLDOWN_MINUTES, "seen.json"),
+                           metrics, COOLDOWN_MINUTES, SCRAPE_TIMEOUT)
+    scheduler = comick.PollScheduler(POLL_BASE_SECONDS, POLL_FLOOR_SECONDS, POLL_CEILING_SECONDS, POLL_ERROR_CEILING_SECONDS)
+    bus = events.EventBus(events.EventLog(event_log_file, EVENT_LOG_SIZE))
+    metrics.collect(lambda: {"backlog_releases": len(poller.backlog), "event_seq": bus.log.seq, "followers": len(bus.writers)})
+    await bus.start(SCRAPER_DAEMON_HOST, SCRAPER_DAEMON_PORT)
+    print(f"[INFO] Publishing release events on {SCRAPER_DAEMON_HOST}:{SCRAPER_DAEMON_PORT} (last event {bus.log.seq})")
+    if METRICS_PORT:
+        try:
+            await pipeline_metrics.serve(metrics, "127.0.0.1", METRICS_PORT, 3 * POLL_ERROR_CEILING_SECONDS)
+        except OSError as e:
+            print(f"[ERROR] Failed to start metrics server: {e}")
+
+    while True:
+        try:
+            with metrics.timer("tick"):
+                outcome, releases = await poller.poll()
+        except Exception as e:
+            print(f"[ERROR] Exception while polling: {e}")
+            outcome, releases = "error", []
+        for release in releases:
+            await bus.publish(release_event(release))
+        # Not kept for replay: only tells consumers the scraper is alive and how the last poll went.
+        await bus.publish({"type": "tick", "outcome": outcome, "head": bus.log.seq}, persist=False)
+        metrics.inc(f"ticks_{outcome}")
+        if outcome != "error":
+            metrics.mark_success()
+        interval = scheduler.record(outcome)
+        print(f"[INFO] Poll {outcome}, {len(releases)} new releases published, next poll in {interval:.0f}s")
+        await asyncio.sleep(interval)
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
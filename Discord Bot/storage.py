@@ -0,0 +1,249 @@
+import os
+import json
+import sqlite3
+
+from subscriptions import SubscriptionIndex
+
+def load_json_subscriptions(path):
+    """Read subscriptions.json, accepting both the current layout and the legacy {user_id: [series]} file."""
+    notify_me, notify_all, notify_roles, notify_channels = {}, set(), {}, {}
+    with open(path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and ("notify_all" in data or "notify_roles" in data or "notify_me" in data):
+        if isinstance(data.get("notify_me"), dict):
+            for user_id, series_list in data["notify_me"].items():
+                notify_me[int(user_id)] = set(series_list)
+        if isinstance(data.get("notify_all"), list):
+            notify_all.update(data["notify_all"])
+        if isinstance(data.get("notify_roles"), dict):
+            for series, roles in data["notify_roles"].items():
+                notify_roles[series] = list(dict.fromkeys(roles)) if isinstance(roles, list) else []
+        if isinstance(data.get("notify_channels"), dict):
+            notify_channels.update({int(g): int(c) for g, c in data["notify_channels"].items()})
+    elif isinstance(data, dict):
+        for user_id, series_list in data.items():
+            notify_me[int(user_id)] = set(series_list)
+    return notify_me, notify_all, notify_roles, notify_channels
+
+class JsonStore:
+    """Whole-file JSON backend persisting the in-memory state returned by load().
+
+    Writes are behind: mutations only mark the state dirty and the caller
+    flushes periodically, so a burst of changes costs one file write.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = (SubscriptionIndex(), set(), {}, {})
+        self.pending = 0
+        self.stats = {"mutations": 0, "writes": 0, "coalesced": 0}
+
+    def load(self):
+        if os.path.isfile(self.path):
+            try:
+                notify_me, notify_all, notify_roles, notify_channels = load_json_subscriptions(self.path)
+                self.state = (SubscriptionIndex.from_dict(notify_me), notify_all, notify_roles, notify_channels)
+            except Exception as e:
+                print(f"[ERROR] Failed to load subscriptions: {e}")
+        return self.state
+
+    def snapshot(self):
+        """Serializable copy of the state if it changed since the last snapshot, else None."""
+        if not self.pending:
+            return None
+        notify_me, notify_all, notify_roles, notify_channels = self.state
+        snapshot = {
+            "notify_me": {str(uid): list(series) for uid, series in notify_me.items()},
+            "notify_all": list(notify_all),
+            "notify_roles": {series: list(roles) for series, roles in notify_roles.items()},
+            "notify_channels": {str(guild_id): channel_id for guild_id, channel_id in notify_channels.items()}
+        }
+        self.stats["writes"] += 1
+        self.stats["coalesced"] += self.pending - 1
+        self.pending = 0
+        return snapshot
+
+    def write(self, snapshot):
+        try:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[ERROR] Failed to save subscriptions: {e}")
+
+    def flush(self):
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            self.write(snapshot)
+
+    def _mark_dirty(self):
+        self.pending += 1
+        self.stats["mutations"] += 1
+
+    def add_subscriptions(self, user_id, series_list):
+        self._mark_dirty()
+
+    def remove_subscriptions(self, user_id, series_list):
+        self._mark_dirty()
+
+    def remove_user(self, user_id):
+        self._mark_dirty()
+
+    def add_notify_all(self, series):
+        self._mark_dirty()
+
+    def remove_notify_all(self, series):
+        self._mark_dirty()
+
+    def add_notify_role(self, series, role):
+        self._mark_dirty()
+
+    def remove_notify_role(self, series, role):
+        self._mark_dirty()
+
+    def set_notify_channel(self, guild_id, channel_id):
+        self._mark_dirty()
+
+    def data_version(self):
+        # Only this process writes the file.
+        return None
+
+    def close(self):
+        self.flush()
+
+class SqliteStore:
+    """Embedded SQLite (WAL) backend with one row per subscription, indexed by user and by series."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            user_id INTEGER NOT NULL,
+            series TEXT NOT NULL,
+            PRIMARY KEY (user_id, series)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS subscriptions_by_series ON subscriptions (series, user_id);
+        CREATE TABLE IF NOT EXISTS notify_all (series TEXT PRIMARY KEY);
+        CREATE TABLE IF NOT EXISTS notify_roles (
+            series TEXT NOT NULL,
+            role TEXT NOT NULL,
+            UNIQUE (series, role)
+        );
+        CREATE TABLE IF NOT EXISTS notify_channels (guild_id INTEGER PRIMARY KEY, channel_id INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self.stats = {"mutations": 0}
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript(self.SCHEMA)
+        if legacy_json:
+            self._migrate_json(legacy_json)
+
+    def _migrate_json(self, path):
+        if not os.path.isfile(path) or self.conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return
+        try:
+            notify_me, notify_all, notify_roles, notify_channels = load_json_subscriptions(path)
+        except Exception as e:
+            print(f"[ERROR] Failed to migrate {path}: {e}")
+            return
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO subscriptions VALUES (?, ?)", ((uid, s) for uid, series in notify_me.items() for s in series))
+            self.conn.executemany("INSERT OR IGNORE INTO notify_all VALUES (?)", ((s,) for s in notify_all))
+            self.conn.executemany("INSERT OR IGNORE INTO notify_roles VALUES (?, ?)", ((s, str(r)) for s, roles in notify_roles.items() for r in roles))
+            self.conn.executemany("INSERT OR REPLACE INTO notify_channels VALUES (?, ?)", notify_channels.items())
+            self.conn.execute("INSERT INTO meta VALUES ('migrated_json', ?)", (path,))
+        print(f"[INFO] Migrated {sum(map(len, notify_me.values()))} subscriptions from {path} to {self.path}")
+
+    def load(self, conn=None):
+        conn = conn or self.conn
+        notify_me, notify_all, notify_roles = SubscriptionIndex(), set(), {}
+        for user_id, series in conn.execute("SELECT user_id, series FROM subscriptions ORDER BY user_id"):
+            notify_me.subscribe(user_id, series)
+        notify_all.update(s for (s,) in conn.execute("SELECT series FROM notify_all"))
+        for series, role in conn.execute("SELECT series, role FROM notify_roles ORDER BY rowid"):
+            notify_roles.setdefault(series, []).append(role)
+        notify_channels = dict(conn.execute("SELECT guild_id, channel_id FROM notify_channels"))
+        return notify_me, notify_all, notify_roles, notify_channels
+
+    def load_detached(self):
+        """load() on a connection of its own, in one read transaction, so it can run in a worker thread."""
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute("BEGIN")
+            return self.load(conn)
+        finally:
+            conn.close()
+
+    def snapshot(self):
+        # Every mutation is already its own transaction; nothing is written behind.
+        return None
+
+    def write(self, snapshot):
+        pass
+
+    def flush(self):
+        pass
+
+    def add_subscriptions(self, user_id, series_list):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO subscriptions VALUES (?, ?)", ((user_id, s) for s in series_list))
+
+    def remove_subscriptions(self, user_id, series_list):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.executemany("DELETE FROM subscriptions WHERE user_id = ? AND series = ?", ((user_id, s) for s in series_list))
+
+    def remove_user(self, user_id):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM subscriptions WHERE user_id = ?", (user_id,))
+
+    def add_notify_all(self, series):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO notify_all VALUES (?)", (series,))
+
+    def remove_notify_all(self, series):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM notify_all WHERE series = ?", (series,))
+
+    def add_notify_role(self, series, role):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO notify_roles VALUES (?, ?)", (series, str(role)))
+
+    def remove_notify_role(self, series, role):
+        self.stats["mutations"] += 1
+        with self.conn:
+            self.conn.execute("DELETE FROM notify_roles WHERE series = ? AND role = ?", (series, str(role)))
+
+    def set_notify_channel(self, guild_id, channel_id):
+        self.stats["mutations"] += 1
+        with self.conn:
+            if channel_id is None:
+                self.conn.execute("DELETE FROM notify_channels WHERE guild_id = ?", (guild_id,))
+            else:
+                self.conn.execute("INSERT OR REPLACE INTO notify_channels VALUES (?, ?)", (guild_id, channel_id))
+
+    def data_version(self):
+        """Changes whenever another connection (e.g. another shard process) commits to the database."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+def open_store(backend, json_path, sqlite_path):
+    if backend == "json":
+        return JsonStore(json_path)
+    if backend == "sqlite":
+        return SqliteStore(sqlite_path, legacy_json=json_path)
+    raise ValueError(f"Unknown subscriptions backend: {backend}")
@@ -0,0 +1,210 @@
+import re
+import os
+import sys
+import json
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+class SubscriptionIndex:
+    """Compact user <-> series subscription table.
+
+    Series names are interned once and referred to by small integer IDs.
+    Each user holds a sorted array of series IDs and each series a sorted
+    array of user IDs, so a subscription is a packed integer on each side
+    rather than an entry in two sets; each user still costs a dict entry and
+    an array object. bench/subscriptions_memory.py measures the real total.
+    """
+
+    def __init__(self):
+        self.series_ids = {}
+        self.series_names = []
+        self.members = []
+        self.user_series = {}
+
+    @classmethod
+    def from_dict(cls, notify_me):
+        index = cls()
+        for user_id, series in notify_me.items():
+            for name in series:
+                index.subscribe(user_id, name)
+        return index
+
+    def _series_id(self, name, create=False):
+        series_id = self.series_ids.get(name)
+        if series_id is None and create:
+            series_id = self.series_ids[sys.intern(name)] = len(self.series_names)
+            self.series_names.append(name)
+            self.members.append(array("Q"))
+        return series_id
+
+    def subscribe(self, user_id, name):
+        series_id = self._series_id(name, create=True)
+        ids = self.user_series.get(user_id)
+        if ids is None:
+            ids = self.user_series[user_id] = array("I")
+        pos = bisect_left(ids, series_id)
+        if pos < len(ids) and ids[pos] == series_id:
+            return False
+        ids.insert(pos, series_id)
+        members = self.members[series_id]
+        members.insert(bisect_left(members, user_id), user_id)
+        return True
+
+    def unsubscribe(self, user_id, name):
+        series_id = self._series_id(name)
+        ids = self.user_series.get(user_id)
+        if series_id is None or ids is None:
+            return False
+        pos = bisect_left(ids, series_id)
+        if pos == len(ids) or ids[pos] != series_id:
+            return False
+        del ids[pos]
+        if not ids:
+            del self.user_series[user_id]
+        members = self.members[series_id]
+        del members[bisect_left(members, user_id)]
+        return True
+
+    def unsubscribe_all(self, user_id):
+        removed = self.series_of(user_id)
+        for name in removed:
+            self.unsubscribe(user_id, name)
+        return removed
+
+    def series_of(self, user_id):
+        return [self.series_names[i] for i in self.user_series.get(user_id, ())]
+
+    def subscribers_of(self, name):
+        series_id = self._series_id(name)
+        return self.members[series_id] if series_id is not None else ()
+
+    def is_subscribed(self, user_id, name):
+        series_id = self._series_id(name)
+        ids = self.user_series.get(user_id, ())
+        pos = bisect_left(ids, series_id) if series_id is not None else len(ids)
+        return pos < len(ids) and ids[pos] == series_id
+
+    def items(self):
+        for user_id in self.user_series:
+            yield user_id, self.series_of(user_id)
+
+    def subscription_count(self):
+        return sum(len(ids) for ids in self.user_series.values())
+
+    def __len__(self):
+        return len(self.user_series)
+
+    def __contains__(self, user_id):
+        return user_id in self.user_series
+
+def normalize(title):
+    """Matching key for a series title: case, width, apostrophes, punctuation and spacing are ignored."""
+    title = unicodedata.normalize("NFKC", title).casefold()
+    title = re.sub(r"['\u2019`]", "", title)
+    title = re.sub(r"[^\w\s]|_", " ", title)
+    return " ".join(title.split())
+
+def load_aliases(path):
+    """Read {canonical series name: [alternate titles or comick slugs]} from path, if it exists."""
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[ERROR] Failed to load aliases: {e}")
+        return {}
+
+class TitleMatcher:
+    """Maps scraped update cards to the series names subscriptions are stored under.
+
+    Names are indexed by their normalized key, and cards are looked up by
+    slug first and then by normalized title, so matching stays one dict
+    lookup per card however many series are tracked. A slug is learned the
+    first time its card matches by title, so later title drift still matches.
+    """
+
+    def __init__(self, aliases=None):
+        self.keys = {}
+        self.slugs = {}
+        self.aliases = {}
+        self._synced = 0
+        for canonical, alternates in (aliases or {}).items():
+            self.add(canonical)
+            for alternate in alternates:
+                self.aliases[normalize(alternate)] = normalize(canonical)
+                self.slugs[alternate.strip().lower()] = self.keys[normalize(canonical)]
+
+    def add(self, name):
+        key = normalize(name)
+        self.keys.setdefault(self.aliases.get(key, key), set()).add(name)
+
+    def update(self, names):
+        for name in names:
+            self.add(name)
+
+    def sync(self, index):
+        """Index the series names a SubscriptionIndex gained since the last sync."""
+        self.update(index.series_names[self._synced:])
+        self._synced = len(index.series_names)
+
+    def match(self, title, slug=None):
+        if slug and slug in self.slugs:
+            return self.slugs[slug]
+        key = normalize(title)
+        names = self.keys.get(self.aliases.get(key, key), set())
+        if slug and names:
+            self.slugs[slug] = names
+        return names
+
+class SeriesSearch:
+    """Autocomplete index over a list of series names.
+
+    Whole-name prefixes are answered by bisecting the sorted normalized
+    names; longer queries by intersecting trigram posting lists, so a lookup
+    touches only candidate names rather than the whole catalog.
+    """
+
+    def __init__(self, names=()):
+        self.names = sorted(set(names), key=normalize)
+        self.keys = [normalize(name) for name in self.names]
+        self.trigrams = {}
+        for i, key in enumerate(self.keys):
+            for gram in {key[j:j + 3] for j in range(len(key) - 2)}:
+                self.trigrams.setdefault(gram, array("I")).append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=25):
+        query = normalize(query)
+        if not query:
+            return self.names[:limit]
+        results = []
+        pos = bisect_left(self.keys, query)
+        while pos < len(self.keys) and self.keys[pos].startswith(query) and len(results) < limit:
+            results.append(pos)
+            pos += 1
+        if len(results) < limit:
+            seen = set(results)
+            for i in self._candidates(query):
+                if i not in seen and query in self.keys[i]:
+                    results.append(i)
+                    if len(results) == limit:
+                        break
+        return [self.names[i] for i in results]
+
+    def _candidates(self, query):
+        if len(query) < 3:
+            # Too short for trigrams: match the start of any word instead.
+            return (i for i, key in enumerate(self.keys) if f" {query}" in f" {key}")
+        postings = sorted((self.trigrams.get(query[j:j + 3], ()) for j in range(len(query) - 2)), key=len)
+        if not postings[0]:
+            return ()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)